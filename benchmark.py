@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Measures how fast each screen renders, offline, at several sizes. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import argparse
+import datetime
+import importlib
+import importlib.machinery
+import importlib.util
+import json
+import math
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCREENS = ['daily', 'hourly', 'info', 'speedtest', 'trend']
+RESOLUTIONS = ['480x320', '1024x600', '1920x1080', '3840x2160']
+# A recorded Dark Sky response and speedtest-cli result, replayed every frame
+FORECAST_FIXTURE = os.path.join(HERE, 'example', 'darksky_forecast.json')
+SPEEDTEST_FIXTURE = os.path.join(HERE, 'example', 'speedtest_result.json')
+# Frames drawn before timing starts, and frames traced for allocations
+WARMUP_FRAMES = 3
+TRACED_FRAMES = 10
+
+
+def load_sample_settings():
+    """
+    Loads config.py.sample and the plugin_configs/*.sample files in place of
+    the user's settings, so that results from different machines can be
+    compared and no Dark Sky key is needed.
+    """
+    settings = [('config', 'config.py.sample')]
+    for screen in SCREENS:
+        settings.append(('plugin_configs.%s_config' % screen,
+                         'plugin_configs/%s_config.py.sample' % screen))
+    for name, path in settings:
+        loader = importlib.machinery.SourceFileLoader(
+            name, os.path.join(HERE, path))
+        module = importlib.util.module_from_spec(
+            importlib.util.spec_from_loader(name, loader))
+        loader.exec_module(module)
+        sys.modules[name] = module
+        package, _, attribute = name.rpartition('.')
+        if package:
+            setattr(importlib.import_module(package), attribute, module)
+
+
+def history_fixture(days):
+    """
+    The recorded speedtest result repeated every 15 minutes over the last
+    `days` days, slower in the evening, for the trend screen.
+    """
+    with open(SPEEDTEST_FIXTURE) as f:
+        result = json.load(f)
+    now = int(time.time())
+    for timestamp in range(now - days * 86400, now, 900):
+        load = 0.8 + 0.2 * math.cos(timestamp % 86400 / 86400 * 2 * math.pi)
+        yield dict(result, download=result['download'] * load,
+                   upload=result['upload'] * load,
+                   timestamp=datetime.datetime.fromtimestamp(
+                       timestamp, datetime.timezone.utc).strftime(
+                           "%Y-%m-%dT%H:%M:%S.%fZ"))
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1,
+                       int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+def run_case(screen_name, size, frames, cold):
+    """
+    Draws one screen headless at the given size and returns its numbers.
+    Every frame redraws the whole screen, as on a screen switch or new data.
+    With cold, the font, text, icon and dial caches are emptied before
+    each frame as well. Allocations only count memory traced by Python, not
+    pixel buffers allocated by SDL.
+    """
+    load_sample_settings()
+    import config
+    import plugin_configs.speedtest_config as speedtest_config
+    import plugin_configs.trend_config as trend_config
+    import speedtest
+    from history import SpeedtestHistory
+    from plugins import load_plugins
+    from screen import MyDisplay
+    from providers import ReplayProvider
+    from weather import (FORECAST_FIELDS, ICONS, forecast_source,
+                         preload_icons, process_forecast)
+    from dial import DIALS
+
+    provider = ReplayProvider(FORECAST_FIELDS, FORECAST_FIXTURE)
+    forecast = forecast_source((config.LAT, config.LON)).fetcher
+    forecast.seed(process_forecast(provider.parse(provider.fetch(0))),
+                  round(time.time()))
+    speedtest_dir = tempfile.mkdtemp(prefix='piweatherrock-benchmark-')
+    os.makedirs(os.path.join(speedtest_dir, 'queue'))
+    shutil.copy(SPEEDTEST_FIXTURE,
+                os.path.join(speedtest_dir, 'queue', 'result.json'))
+    speedtest.SPEEDTEST_DIR = speedtest_dir + '/'
+    speedtest.SPEEDTEST_ICON_DIR = os.path.join(HERE, 'icons', 'speedtest/')
+    speedtest_config.SPEEDTEST_HISTORY = os.path.join(speedtest_dir,
+                                                      'history.db')
+    SpeedtestHistory(speedtest_config.SPEEDTEST_HISTORY).add_all(
+        history_fixture(trend_config.DAYS))
+
+    try:
+        display = MyDisplay(size)
+        preload_icons(display.icon_size)
+        plugin = load_plugins([screen_name], display)[screen_name]
+        last_update_time = plugin.fetch(0)
+
+        def frame():
+            if cold:
+                display.fonts.clear()
+                display.text.clear()
+                ICONS.clear()
+                DIALS.clear()
+            display.invalidate()
+            plugin.render(last_update_time)
+
+        for _ in range(WARMUP_FRAMES):
+            frame()
+
+        times = []
+        for _ in range(frames):
+            start = time.perf_counter()
+            frame()
+            times.append(time.perf_counter() - start)
+
+        allocated = []
+        tracemalloc.start()
+        for _ in range(TRACED_FRAMES):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            frame()
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(speedtest_dir)
+
+    return {
+        'screen': screen_name,
+        'size': '%dx%d' % size,
+        'frames': frames,
+        'cold': cold,
+        'fps': frames / sum(times),
+        'p50_ms': percentile(times, 50) * 1000,
+        'p99_ms': percentile(times, 99) * 1000,
+        'alloc_kb_per_frame': sum(allocated) / len(allocated) / 1024,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_isolated(screen_name, size, frames, cold):
+    """
+    Runs one case in a fresh interpreter, so peak RSS belongs to that screen
+    and size alone.
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--case',
+               '--screens', screen_name, '--sizes', size,
+               '--frames', str(frames)]
+    if cold:
+        command.append('--cold')
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    output = subprocess.run(command, cwd=HERE, env=env, check=True,
+                            stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+    # The result is the last line, after anything pygame printed.
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def resolution(text):
+    width, height = text.lower().split('x')
+    return (int(width), int(height))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark every screen using recorded data.')
+    parser.add_argument('--screens', nargs='+', default=SCREENS,
+                        choices=SCREENS, help='screens to draw')
+    parser.add_argument('--sizes', nargs='+', default=RESOLUTIONS,
+                        metavar='WIDTHxHEIGHT', help='resolutions to draw at')
+    parser.add_argument('--frames', type=int, default=50,
+                        help='timed frames per screen and size')
+    parser.add_argument('--cold', action='store_true',
+                        help='empty the font, text, icon and dial '
+                             'caches before every frame')
+    parser.add_argument('--json', metavar='FILE',
+                        help='also save the results here, for comparing runs')
+    parser.add_argument('--case', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.chdir(HERE)  # Icons are looked up relative to the project
+    if args.case:
+        print(json.dumps(run_case(args.screens[0], resolution(args.sizes[0]),
+                                  args.frames, args.cold)))
+        return
+
+    results = []
+    print('%-10s %-10s %8s %8s %8s %12s %10s' % (
+        'screen', 'size', 'fps', 'p50 ms', 'p99 ms', 'alloc KB/fr',
+        'RSS MB'))
+    for size in args.sizes:
+        for screen_name in args.screens:
+            result = run_isolated(screen_name, size, args.frames, args.cold)
+            results.append(result)
+            print('%-10s %-10s %8.1f %8.2f %8.2f %12.1f %10.1f' % (
+                result['screen'], result['size'], result['fps'],
+                result['p50_ms'], result['p99_ms'],
+                result['alloc_kb_per_frame'], result['peak_rss_mb']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Caches shared by every screen of the weather display. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+from collections import OrderedDict
+
+# third party imports
+import pygame
+
+
+class FontCache:
+    """
+    Keeps pygame Font objects so that each (name, pixel size, bold)
+    combination is only looked up and loaded from disk once. Pixel sizes
+    are derived from the screen resolution, so a cache built for one
+    resolution simply never sees the keys of another.
+    """
+    def __init__(self):
+        self.fonts = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, font_name, size, bold=True):
+        key = (font_name, int(size), bool(bold))
+        font = self.fonts.get(key)
+        if font is None:
+            self.misses += 1
+            font = pygame.font.SysFont(key[0], key[1], bold=key[2])
+            self.fonts[key] = font
+        else:
+            self.hits += 1
+        return font
+
+    def clear(self):
+        self.fonts.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return "Font cache: %d fonts, %d hits, %d misses" % (
+            len(self.fonts), self.hits, self.misses)
+
+
+class IconAtlas:
+    """
+    Holds every icon decoded once and converted to the display's pixel
+    format, keyed by file path. Icons of different sizes live in different
+    directories, so one atlas serves any resolution.
+    """
+    def __init__(self):
+        self.icons = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, fit_to=None):
+        """
+        Returns the icon at path. If fit_to (w, h) is given the icon is
+        scaled once to fit in it; pygame 2 also decodes SVG files this way.
+        """
+        key = path if fit_to is None else (path, fit_to)
+        icon = self.icons.get(key)
+        if icon is None:
+            self.misses += 1
+            icon = pygame.image.load(path).convert_alpha()
+            if fit_to is not None:
+                scale = min(fit_to[0] / icon.get_width(),
+                            fit_to[1] / icon.get_height())
+                icon = pygame.transform.smoothscale(icon, (
+                    int(icon.get_width() * scale),
+                    int(icon.get_height() * scale)))
+            self.icons[key] = icon
+        else:
+            self.hits += 1
+        return icon
+
+    # Decode a list of icons up front so the render loop never touches disk.
+    # Must be called after pygame.display.set_mode().
+    def preload(self, paths):
+        for path in paths:
+            self.get(path)
+
+    def clear(self):
+        self.icons.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return "Icon atlas: %d icons, %d hits, %d misses" % (
+            len(self.icons), self.hits, self.misses)
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+class SurfaceCache:
+    """
+    Least recently used cache of rendered surfaces. The total pixel memory
+    held is capped at max_bytes; the oldest surfaces are dropped first.
+    """
+    def __init__(self, max_bytes):
+        self.surfaces = OrderedDict()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self.surfaces.move_to_end(key)
+        self.hits += 1
+        return surface
+
+    def put(self, key, surface):
+        if key in self.surfaces:
+            self.bytes -= surface_bytes(self.surfaces.pop(key))
+        self.surfaces[key] = surface
+        self.bytes += surface_bytes(surface)
+        # Always keep the newest surface, even if it is over the cap alone.
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            (old_key, old_surface) = self.surfaces.popitem(last=False)
+            self.bytes -= surface_bytes(old_surface)
+            self.evictions += 1
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def stats(self, name="Surface cache"):
+        return "%s: %d surfaces, %.1f MB, %d hits, %d misses, %d evictions" % (
+            name, len(self.surfaces), self.bytes / 1048576, self.hits,
+            self.misses, self.evictions)
+
+
+class TextCache(SurfaceCache):
+    """
+    Rendered text surfaces keyed by (text, font, color), so labels and values
+    that stay the same from one frame to the next are only rendered once.
+    """
+    def __init__(self, fonts, max_bytes):
+        super().__init__(max_bytes)
+        self.fonts = fonts
+
+    def render(self, text, font_name, size, color, bold=True):
+        key = (text, font_name, int(size), bool(bold), tuple(color))
+        surface = self.get(key)
+        if surface is None:
+            font = self.fonts.get(font_name, size, bold)
+            surface = font.render(text, True, color)
+            self.put(key, surface)
+        return surface
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Switches each display between its screens. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import syslog
+
+# local imports
+import plugin_configs.info_config as info_config
+from instrument import INSTRUMENTS
+from plugins import load_plugins
+from scheduler import SCHEDULER
+from weather_rock_methods import *
+
+
+# Seconds until the clock on screen next changes.
+def seconds_to_next_minute(now):
+    return 60 - now % 60
+
+
+class ScreenCycle:
+    """
+    Which screen one display shows, and when it switches: each of `screens`
+    in turn for its PAUSE, and every info_config.DELAY seconds the info
+    screen for its PAUSE. Screens subscribe to their data through
+    subscribe(key, plugin) when they are loaded, and switches counts how
+    often each one was shown.
+
+    Every display drawn by this process has its own cycle. The screens of
+    the first one, whose name is None, are known by their plain names to
+    the scheduler and in metrics, those of the others as 'name/screen'.
+    """
+    def __init__(self, display, screens, subscribe, switches, name=None):
+        self.display = display
+        self.name = name
+        self.subscribe = subscribe
+        self.switches = switches
+        self.plugins = load_plugins(screens + ['info'], display, self.loaded)
+        self.screen_info = {}
+        for screen in screens:
+            self.screen_info[screen] = {}
+            self.screen_info[screen]['count'] = 0
+            self.screen_info[screen]['pause'] = self.plugins.config(
+                screen).PAUSE
+        self.mode = screens[0]  # Default to the first screen
+        reset_counter(self.mode, self.screen_info)
+        self.shown_mode = None  # The screen drawn last
+        self.last_update_time = {}
+        self.info_screen_start = 0      # When info was last switched to
+        self.non_info_screen_start = 0  # When the others were switched to
+        self.next_switch = 0
+
+    def key(self, screen):
+        if self.name is None:
+            return screen
+        return '%s/%s' % (self.name, screen)
+
+    def loaded(self, screen, plugin):
+        self.subscribe(self.key(screen), plugin)
+
+    def log(self, message):
+        if self.name is not None:
+            message = '%s: %s' % (self.name, message)
+        syslog.syslog(message)
+
+    # Stop showing a screen that has no data to show.
+    def drop(self, screen):
+        self.log('Error retreiving intial %s data. It will not be shown.'
+                 % screen)
+        del self.screen_info[screen]
+        SCHEDULER.unsubscribe(self.key(screen))
+
+    def fetch_all(self):
+        """
+        Fetches the data of every screen right away, for LAZY_STARTUP =
+        False, and drops the screens that have none. Returns False if there
+        is no forecast for the info screen.
+        """
+        self.last_update_time['info'] = self.plugins['info'].fetch(0)
+        if not self.last_update_time['info']:
+            return False
+        self.log('Successfully retreived intial weather data.')
+        for screen in list(self.screen_info):
+            self.log('Retreiving intial %s data' % screen)
+            self.last_update_time[screen] = self.plugins[screen].fetch(0)
+            if self.last_update_time[screen]:
+                self.log('Successfully retreived intial %s data' % screen)
+            else:
+                self.drop(screen)
+        if self.mode not in self.screen_info:
+            self.mode = next(iter(self.screen_info), 'info')
+        return True
+
+    # Show `mode` now and count the switching times from here, e.g. on a
+    # key press.
+    def show(self, mode, now):
+        self.mode = mode
+        reset_counter(mode, self.screen_info)
+        self.info_screen_start = now
+        self.non_info_screen_start = now
+        self.next_switch = now + time_to_switch(self.screen_info)
+
+    # Switch to the next screen if it is time to.
+    def advance(self, now):
+        if self.mode not in self.screen_info:
+            # Default in config.py.sample: pause for 5 minutes on info screen.
+            self.next_switch = self.info_screen_start + info_config.PAUSE
+            if now >= self.next_switch and not self.screen_info:
+                # No other screen is left, show info for another PAUSE
+                self.info_screen_start = now
+                self.next_switch = now + info_config.PAUSE
+            elif now >= self.next_switch:
+                first = list(self.screen_info)[0]
+                self.log("Switching from INFO screen to %s screen at %d "
+                         "seconds" % (first.upper(),
+                                      now - self.info_screen_start))
+                self.mode = first
+                reset_counter(self.mode, self.screen_info)
+                self.non_info_screen_start = now
+                self.next_switch = now + time_to_switch(self.screen_info)
+        elif now >= self.non_info_screen_start + info_config.DELAY:
+            # Default in config.py.sample: flip between 2 weather screens
+            # for 15 minutes before showing info screen.
+            self.log("Switching to INFO screen at %d seconds"
+                     % (now - self.non_info_screen_start))
+            # The caches are shared by all displays, see MyDisplay
+            if self.name is None:
+                from weather import ICONS
+                syslog.syslog(self.display.fonts.stats())
+                syslog.syslog(ICONS.stats())
+                syslog.syslog(self.display.text.stats('Text cache'))
+                for line in INSTRUMENTS.summary():
+                    syslog.syslog(line)
+            self.mode = 'info'
+            self.info_screen_start = now
+            self.next_switch = now + info_config.PAUSE
+        elif now >= self.next_switch:
+            screens = list(self.screen_info)
+            new_screen = screens[(screens.index(self.mode) + 1) % len(screens)]
+            self.log("Switching from %s screen to %s screen at %d seconds" % (
+                self.mode.upper(), new_screen.upper(),
+                now - self.non_info_screen_start))
+            self.mode = new_screen
+            self.screen_info[self.mode]['count'] += 1
+            # Switching times add up from when the plugin screens started
+            self.next_switch = (self.non_info_screen_start +
+                                time_to_switch(self.screen_info))
+
+    def draw(self, now):
+        """
+        Draws the current screen. Returns True if it was drawn with its
+        data, or False if the splash screen is shown until that arrives. A
+        screen without data sources that has nothing to show is dropped,
+        and the next one drawn instead.
+        """
+        mode = self.mode
+        plugin = self.plugins[mode]
+        if mode != self.shown_mode:
+            self.switches[self.key(mode)] += 1
+            self.shown_mode = mode
+        with INSTRUMENTS.span('fetch %s' % self.key(mode)):
+            self.last_update_time[mode] = plugin.fetch(
+                self.last_update_time.get(mode, 0))
+        if self.last_update_time[mode]:
+            with INSTRUMENTS.span('render %s' % self.key(mode)):
+                plugin.render(self.last_update_time[mode])
+            return True
+        if plugin.DATA_SOURCES:
+            # The first fetch of this screen's data has not succeeded yet. It
+            # is retried in the background, keep showing the clock meanwhile.
+            self.display.draw_splash()
+            return False
+        screens = list(self.screen_info)
+        new_screen = screens[(screens.index(mode) + 1) % len(screens)]
+        self.drop(mode)
+        self.show(new_screen if new_screen in self.screen_info else 'info',
+                  now)
+        return self.draw(now)
+
+    # When this display next has to be drawn: when the clock changes, the
+    # screen switches, the info screen is due, or the screen wants to poll.
+    def deadline(self, now):
+        deadlines = [now + seconds_to_next_minute(now), self.next_switch]
+        if self.mode in self.screen_info:
+            deadlines.append(self.non_info_screen_start + info_config.DELAY)
+        if self.plugins[self.mode].POLL_INTERVAL:
+            deadlines.append(now + self.plugins[self.mode].POLL_INTERVAL)
+        return min(deadlines)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Speedtest dials drawn with pygame instead of rasterized from SVG. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import math
+
+# third party imports
+import pygame
+import pygame.gfxdraw
+
+# local imports
+from cache import SurfaceCache
+
+# Colors of the dial zones, see speedtest_config.RED_CUTOFF and YELLOW_CUTOFF
+RED = (255, 26, 26)
+YELLOW = (255, 255, 26)
+GREEN = (26, 255, 26)
+# Speeds over the promised one start a second lap in this color, as the
+# green 105% to 125% images did
+OVER = (26, 26, 255)
+EMPTY = (26, 26, 26)
+BACKGROUND = (0, 0, 0)
+# The ring is split in segments of 5%
+SEGMENTS = 20
+# Limits of what a dial shows: a sliver even for no speed at all, and at most
+# a quarter of the second lap
+MIN_PERCENT = 5
+MAX_PERCENT = 125
+
+
+def zone_color(percent, red_cutoff, yellow_cutoff):
+    if red_cutoff >= percent:
+        return RED
+    elif yellow_cutoff >= percent:
+        return YELLOW
+    return GREEN
+
+
+# Where the ring is, as seen from its center, at the given angle in degrees
+# clockwise from the top.
+def polar(center, radius, degrees):
+    radians = math.radians(degrees)
+    return (center + radius * math.sin(radians),
+            center - radius * math.cos(radians))
+
+
+def fill_arc(surface, start, end, color):
+    """
+    Fills the ring on a square surface from `start` to `end` degrees, one
+    segment at a time so that no polygon gets wider than a segment.
+    """
+    size = surface.get_width()
+    center = size / 2
+    outer = size / 2 - 1
+    inner = size / 3
+    step = 360 / SEGMENTS
+    while start < end:
+        stop = min(end, (math.floor(start / step) + 1) * step)
+        # A point every 2 degrees keeps the edges round at 4K
+        count = max(2, int((stop - start) / 2) + 1)
+        angles = [start + (stop - start) * i / (count - 1)
+                  for i in range(count)]
+        points = ([polar(center, outer, angle) for angle in angles] +
+                  [polar(center, inner, angle) for angle in reversed(angles)])
+        pygame.gfxdraw.aapolygon(surface, points, color)
+        pygame.gfxdraw.filled_polygon(surface, points, color)
+        start = stop
+
+
+def draw_gaps(surface):
+    size = surface.get_width()
+    center = size / 2
+    width = max(1, round(size / 300))
+    for segment in range(SEGMENTS):
+        angle = segment * 360 / SEGMENTS
+        pygame.draw.line(surface, BACKGROUND,
+                         polar(center, size / 3 - 1, angle),
+                         polar(center, size / 2, angle), width)
+
+
+class DialCache(SurfaceCache):
+    """
+    Speedtest dials: a ring filled clockwise from the top to any percentage,
+    not just multiples of 5%, in the color of its zone. Past 100%, a second
+    lap is filled in OVER, up to MAX_PERCENT; below MIN_PERCENT the dial
+    still shows that much. The empty ring is drawn once per size
+    and only the filled arc is drawn for each new value. Finished dials are
+    kept by size, percentage (to 0.1%) and color.
+    """
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes)
+        self.rings = {}
+
+    def render(self, percent, size, color):
+        size = int(size)
+        percent = round(max(MIN_PERCENT, min(percent, MAX_PERCENT)), 1)
+        key = (size, percent, color)
+        dial = self.get(key)
+        if dial is None:
+            dial = self.ring(size).copy()
+            fill_arc(dial, 0, min(percent, 100) * 3.6, color)
+            if percent > 100:
+                fill_arc(dial, 0, (percent - 100) * 3.6, OVER)
+            draw_gaps(dial)
+            self.put(key, dial)
+        return dial
+
+    # The empty ring of the given size.
+    def ring(self, size):
+        ring = self.rings.get(size)
+        if ring is None:
+            ring = pygame.Surface((size, size))
+            ring.fill(BACKGROUND)
+            fill_arc(ring, 0, 360, EMPTY)
+            self.rings[size] = ring
+        return ring
+
+    def clear(self):
+        super().clear()
+        self.rings.clear()
+
+
+# Room for the download and upload dials on a 4K screen
+DIALS = DialCache(16 * 1048576)
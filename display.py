@@ -37,40 +37,35 @@ __version__ = "0.0.12"
 ###############################################################################
 
 # standard imports
-import os
-import platform
+import argparse
+import collections
 import signal
 import sys
 import syslog
 import time
 
+# Start of the startup profile, see StartupProfile
+startup_began = time.perf_counter()
+
 # third party imports
 import pygame
 
 # local imports
 import config
-import plugin_configs.info_config as info_config
-from weather_rock_methods import *
-
-from info import *
-sys.path.insert(0, './plugin_configs')
-for plugin in config.PLUGINS:
-    exec(plugin + "_config = __import__(plugin + '_config')")
-    exec("from " + plugin + " import *")
+from cycle import ScreenCycle
+from instrument import INSTRUMENTS
+from scheduler import SCHEDULER
+from screen import MyDisplay
 
 # globals
-screen_info = {}
-for plugin in config.PLUGINS:
-    screen_info[plugin] = {}
-    screen_info[plugin]['count'] = 0
-    screen_info[plugin]['pause'] = eval(plugin + '_config.PAUSE')
-    screen_info[plugin]['last_update_time'] = 0
-mode = config.PLUGINS[0]  # Default to first plugin mode. Default is 'daily'.
-reset_counter(mode, screen_info)  # Update screen count variables
 running = True             # Stay running while True
-seconds = 0                # Seconds placeholder to pace display.
-info_screen_time_count = 0  # Time counter to trigger switch to non-info screen
-non_info_screen_time_count = 0  # Time counter to trigger switch to info screen
+show_overlay = False       # Show timings on top of the screen, 'p' key
+screen_switches = collections.Counter()  # Times each screen was shown
+DATA_UPDATED = pygame.USEREVENT + 1  # Posted when a data source has new data
+# Older config.py files load everything at startup, as before LAZY_STARTUP
+lazy_startup = getattr(config, 'LAZY_STARTUP', False)
+instrument = getattr(config, 'INSTRUMENT', False)
+metrics_port = getattr(config, 'METRICS_PORT', None)
 
 
 def exit_gracefully(signum, frame):
@@ -78,160 +73,151 @@ def exit_gracefully(signum, frame):
 
 
 signal.signal(signal.SIGTERM, exit_gracefully)
-
-
-###############################################################################
-class MyDisplay:
-    screen = None
-
-    ####################################################################
-    def __init__(self):
-        "Ininitializes a new pygame screen using the framebuffer"
-        if platform.system() == 'Darwin':
-            pygame.display.init()
-            driver = pygame.display.get_driver()
-            print('Using the {0} driver.'.format(driver))
-        else:
-            # Based on "Python GUI in Linux frame buffer"
-            # http://www.karoltomala.com/blog/?p=679
-            # archived at https://web.archive.org/
-            disp_no = os.getenv("DISPLAY")
-            if disp_no:
-                print("X Display = {0}".format(disp_no))
-                syslog.syslog("X Display = {0}".format(disp_no))
-
-            # Check which frame buffer drivers are available
-            # Start with fbcon since directfb hangs with composite output
-            drivers = ['x11', 'fbcon', 'directfb', 'svgalib']
-            found = False
-            for driver in drivers:
-                # Make sure that SDL_VIDEODRIVER is set
-                if not os.getenv('SDL_VIDEODRIVER'):
-                    os.putenv('SDL_VIDEODRIVER', driver)
-                try:
-                    pygame.display.init()
-                except pygame.error:
-                    print('Driver: {0} failed.'.format(driver))
-                    syslog.syslog('Driver: {0} failed.'.format(driver))
-                    continue
-                found = True
-                break
-
-            if not found:
-                raise Exception('No suitable video driver found!')
-
-        size = (pygame.display.Info().current_w,
-                pygame.display.Info().current_h)
-        print("Framebuffer Size: %d x %d" % (size[0], size[1]))
-        syslog.syslog("Framebuffer Size: %d x %d" % (size[0], size[1]))
-        self.screen = pygame.display.set_mode(size, pygame.FULLSCREEN)
-        # Clear the screen to start
-        self.screen.fill((0, 0, 0))
-        # Initialise font support
-        pygame.font.init()
-        # Render the screen
-        pygame.mouse.set_visible(0)
-        pygame.display.update()
-
-        if config.FULLSCREEN:
-            self.xmax = pygame.display.Info().current_w - 35
-            self.ymax = pygame.display.Info().current_h - 5
-            if self.xmax <= 1024:
-                self.icon_size = '64'
-            else:
-                self.icon_size = '256'
-        else:
-            self.xmax = 480 - 35
-            self.ymax = 320 - 5
-            self.icon_size = '64'
-        self.subwindow_text_height = 0.055
-        self.time_date_text_height = 0.115
-        self.time_date_small_text_height = 0.075
-        self.time_date_y_position = 8
-        self.time_date_small_y_position = 18
-        self.start_time = round(time.time())
-
-    def disp_time_date(self, font_name, text_color, text):
-        # Time & Date
-        time_date_font = pygame.font.SysFont(
-            font_name, int(self.ymax * self.time_date_text_height), bold=1)
-        # Small Font for Seconds
-        small_font = pygame.font.SysFont(
-            font_name,
-            int(self.ymax * self.time_date_small_text_height), bold=1)
-
-        time_string = time.strftime("%a, %b %d   %I:%M", time.localtime())
-        am_pm_string = time.strftime(" %p", time.localtime())
-
-        rendered_time_string = time_date_font.render(time_string, True,
-                                                     text_color)
-        (rendered_time_x, rendered_time_y) = rendered_time_string.get_size()
-        rendered_am_pm_string = small_font.render(am_pm_string, True,
-                                                  text_color)
-        (rendered_am_pm_x, rendered_am_pm_y) = rendered_am_pm_string.get_size()
-
-        full_time_string_x_position = self.xmax / 2 - (rendered_time_x +
-                                                       rendered_am_pm_x) / 2
-        self.screen.blit(rendered_time_string, (full_time_string_x_position,
-                                                self.time_date_y_position))
-        self.screen.blit(rendered_am_pm_string,
-                         (full_time_string_x_position + rendered_time_x + 3,
-                          self.time_date_small_y_position))
-
-    # Save a jpg image of the screen.
-    ####################################################################
-    def screen_cap(self):
-        # Create target Directory if don't exist
-        save_dir = '/home/pi/Pictures/PiWeatherRock/'
-        if not os.path.exists(save_dir):
-            os.mkdir(save_dir)
-        timestamp = time.strftime("%Y-%m-%dT%H.%M.%S", time.localtime())
-        pygame.image.save(self.screen, f"{save_dir}{timestamp}.jpeg")
-        print("Screen capture complete.")
+# kill -USR1 starts a cProfile capture, and a second one saves it.
+signal.signal(signal.SIGUSR1, INSTRUMENTS.toggle_profile)
+INSTRUMENTS.enabled = instrument or bool(metrics_port)
+
+
+# Parses a screen size given as WIDTHxHEIGHT, e.g. 1024x600.
+def resolution(text):
+    try:
+        width, height = text.lower().split('x')
+        return (int(width), int(height))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'expected WIDTHxHEIGHT, got %r' % text)
+
+
+parser = argparse.ArgumentParser(description='Raspberry Pi Weather Display')
+parser.add_argument('--profile-startup', action='store_true',
+                    help='print how long each startup phase took')
+parser.add_argument('--headless', type=resolution, metavar='WIDTHxHEIGHT',
+                    help='draw offscreen at this size instead of on a display')
+parser.add_argument('--frame-dir',
+                    help='with --headless, save every new frame here')
+parser.add_argument('--frame-format', choices=['png', 'raw'], default='png',
+                    help='file format of saved frames (default: png)')
+args = parser.parse_args()
+
+
+class StartupProfile:
+    """
+    Time spent in each startup phase, up to the first screen drawn with
+    data. Phases are timed back to back from when the standard library
+    imports were done.
+    """
+    def __init__(self, start):
+        self.start = start
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = ['Startup profile:']
+        for phase, seconds in self.phases:
+            lines.append('  %-24s %8.1f ms' % (phase, seconds * 1000))
+        lines.append('  %-24s %8.1f ms' % (
+            'total', (self.last - self.start) * 1000))
+        return lines
+
+
+startup = StartupProfile(startup_began)
+startup.mark('imports')
 
 
 # Create an instance of the lcd display class.
-my_disp = MyDisplay()
-
-# Extend my_disp to use methods from all active plugin classes
-all_screens = list(screen_info.keys())
-all_screens.append('info')
-for item in all_screens:
-    my_disp.__class__ = (
-        type('%s_extended_with_%s' % (my_disp.__class__.__name__,
-                                      eval(item.title()).__name__),
-             (my_disp.__class__, eval(item.title())), {})
-        )
-
-# Loads data from darksky.net into class variables.
+my_disp = MyDisplay(args.headless, args.frame_dir, args.frame_format)
+startup.mark('display init')
+my_disp.draw_splash()
+startup.mark('splash screen')
+
+
+# Tell the scheduler which data each screen needs, so every source is only
+# fetched once no matter how many screens (on how many displays) show it.
+def subscribe_plugin(name, plugin):
+    for source, max_age in plugin.DATA_SOURCES.items():
+        SCHEDULER.subscribe(name, source, max_age)
+
+
+# Every configured screen, plus the info screen, created on first use. The
+# other displays in config.DISPLAYS are drawn offscreen by this process too,
+# with the caches of this one.
+main = ScreenCycle(my_disp, config.PLUGINS, subscribe_plugin, screen_switches)
+cycles = [main]
+for settings in getattr(config, 'DISPLAYS', []):
+    if not settings.get('size') and not settings.get('framebuffer'):
+        raise ValueError('Display %s needs a size or a framebuffer'
+                         % settings['name'])
+    display = MyDisplay(settings.get('size'), settings.get('frame_dir'),
+                        settings.get('frame_format', 'png'),
+                        settings.get('framebuffer'),
+                        settings.get('rotation', 0),
+                        (settings.get('lat', config.LAT),
+                         settings.get('lon', config.LON)),
+                        shares=my_disp)
+    display.draw_splash()
+    cycles.append(ScreenCycle(display, settings.get('plugins', config.PLUGINS),
+                              subscribe_plugin, screen_switches,
+                              settings['name']))
+
+for cycle in cycles:
+    if lazy_startup:
+        # Only the first screen and the info screen, which always shows the
+        # forecast, are needed now. The rest load when they first come up.
+        cycle.plugins.load(cycle.mode, 'info')
+    else:
+        cycle.plugins.load_all()
+startup.mark('load plugins')
+
+# Decode all forecast icons now instead of inside the render loop, and show
+# the forecasts saved by the last run until new ones arrive.
+from weather import preload_icons, load_cached_forecast, ICONS
+for icon_size in set(cycle.display.icon_size for cycle in cycles):
+    preload_icons(icon_size)
+load_cached_forecast()
+startup.mark('icons and cached data')
+
+if metrics_port:
+    from metrics import MetricsServer, collect_metrics
+    MetricsServer(getattr(config, 'METRICS_ADDRESS', '127.0.0.1'),
+                  metrics_port,
+                  lambda: collect_metrics(my_disp, screen_switches)).start()
+    syslog.syslog('Serving metrics on port %d' % metrics_port)
+
+# Loads weather data into class variables.
 syslog.syslog('Retreiving intial weather data')
-screen_info['daily']['last_update_time'] = my_disp.get_forecast(0)
-screen_info['hourly']['last_update_time'] = screen_info[
-    'daily']['last_update_time']
-if not screen_info['daily']['last_update_time']:
-    print('Error: no data from darksky.net.')
-    running = False
-syslog.syslog('Successfully retreived intial weather data.')
-
-# Fetch initial data for other plugins
-for plugin in config.PLUGINS:
-    if plugin != 'daily' and plugin != 'hourly':
-        syslog.syslog('Retreiving intial %s data' % plugin)
-        last_update_time = eval(f"my_disp.get_{plugin}(0)")
-        screen_info[plugin]['last_update_time'] = last_update_time
-        if last_update_time:
-            syslog.syslog('Successfully retreived intial %s data' % plugin)
-        else:
-            syslog.syslog(
-                'Error retreiving intial %s data. It will not be shown.'
-                % plugin)
-            del(screen_info[plugin])
+SCHEDULER.start()
+if not lazy_startup:
+    SCHEDULER.wait_for_first_attempts(getattr(config, 'DS_TIMEOUT', 15) + 5)
+    for cycle in cycles:
+        if not cycle.fetch_all():
+            print('Error: no weather data.')
+            running = False
+startup.mark('start data sources')
+
+
+# Wake the main loop as soon as new data arrives. event.post is thread safe.
+SCHEDULER.on_update = lambda source: pygame.event.post(
+    pygame.event.Event(DATA_UPDATED, source=source))
 
 
 # +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+for cycle in cycles:
+    cycle.show(cycle.mode, time.time())
+timeout = 1
 while running:
-    # Look for and process keyboard events to change modes.
-    for event in pygame.event.get():
+    # Sleep until something has to change on screen, waking up right away
+    # for key presses and new data.
+    events = [pygame.event.wait(timeout)]
+    events.extend(pygame.event.get())
+
+    # Look for and process keyboard events to change modes. Keys only
+    # change the screen of the main display.
+    for event in events:
         if event.type == pygame.KEYDOWN:
             # On 'q' or keypad enter key, quit the program.
             if ((event.key == pygame.K_KP_ENTER) or (event.key == pygame.K_q)):
@@ -239,70 +225,58 @@ while running:
             # On 's' key, save a screen shot.
             elif event.key == pygame.K_s:
                 my_disp.screen_cap()
+            # On 'p' key, show or hide the timing overlay.
+            elif event.key == pygame.K_p:
+                show_overlay = not show_overlay
+                INSTRUMENTS.enabled = (show_overlay or instrument or
+                                       bool(metrics_port))
+                my_disp.invalidate()
             else:
+                mode = main.mode
                 # On 'd' key, set mode to 'weather mode' - daily screen.
-                if event.key == pygame.K_d:
+                if event.key == pygame.K_d and 'daily' in main.plugins.names:
                     mode = 'daily'
                 # On 'i' key, set mode to 'info'.
                 elif event.key == pygame.K_i:
                     mode = 'info'
                 # on 'h' key, set mode to 'weather mode' - 'hourly'
-                elif event.key == pygame.K_h:
+                elif (event.key == pygame.K_h and
+                      'hourly' in main.plugins.names):
                     mode = 'hourly'
-                reset_counter(mode, screen_info)
-                info_screen_time_count = 0
-                non_info_screen_time_count = 0
-
-    # Automatically switch back to weather display after info screen pause.
-    if mode not in screen_info.keys():
-        non_info_screen_time_count = 0
-        info_screen_time_count += 1
-        # Default in config.py.sample: pause for 5 minutes on info screen.
-        if info_screen_time_count > info_config.PAUSE:
-            mode = 'daily'
-            reset_counter(mode, screen_info)
-            syslog.syslog(
-                "Switching from INFO screen to DAILY screen at %s seconds"
-                % info_screen_time_count)
-    else:
-        info_screen_time_count = 0
-        non_info_screen_time_count += 1
-        # Update / Refresh the switching time after each second.
-        switch_time = time_to_switch(screen_info)
-
-        # Default in config.py.sample: flip between 2 weather screens
-        # for 15 minutes before showing info screen.
-        if non_info_screen_time_count > info_config.DELAY:
-            mode = 'info'
-            syslog.syslog("Switching to INFO screen at %s seconds"
-                          % non_info_screen_time_count)
-        elif (non_info_screen_time_count % switch_time) == 0:
-            new_screen = list(screen_info)[(
-                list(screen_info).index(mode) + 1) % len(screen_info.keys())]
-            syslog.syslog(
-                "Switching from %s screen to %s screen at %s seconds" % (
-                    mode.upper(), new_screen.upper(),
-                    non_info_screen_time_count))
-            mode = new_screen
-            screen_info[mode]['count'] += 1
-
-    if mode == 'daily' or mode == 'hourly' or mode == 'info':
-        eval(f"my_disp.disp_{mode}"
-                f"(screen_info['daily']['last_update_time'])")
-        last_update_time = eval(f"my_disp.get_{mode}"
-                                f"(screen_info['daily']"
-                                f"['last_update_time'])")
-        screen_info['daily']['last_update_time'] = last_update_time
-        screen_info['hourly']['last_update_time'] = last_update_time
-    else:
-        eval(f"my_disp.disp_{mode}"
-                f"(screen_info[mode]['last_update_time'])")
-        last_update_time = eval(
-            f"my_disp.get_{mode}(screen_info[mode]['last_update_time'])")
-        screen_info[mode]['last_update_time'] = last_update_time
-
-    # Loop timer.
-    pygame.time.wait(1000)
-
-
+                main.show(mode, time.time())
+
+    # Keys still work, but nothing is drawn until the pause is over
+    if my_disp.paused.is_set():
+        timeout = 1000
+        continue
+
+    # Work out how long to sleep: until the next display has to be drawn
+    # again, or the overlay updated.
+    deadlines = []
+    for cycle in cycles:
+        now = time.time()
+        cycle.advance(now)
+        drawn = cycle.draw(now)
+        if cycle is main and drawn and startup is not None:
+            startup.mark('first %s screen' % main.mode)
+            report = startup.report()
+            report.extend('  loaded %-17s %8.1f ms' % (name, seconds * 1000)
+                          for name, seconds in main.plugins.load_times.items())
+            for line in report:
+                syslog.syslog(line)
+            if args.profile_startup:
+                print('\n'.join(report))
+            startup = None
+        if cycle is main and show_overlay:
+            my_disp.draw_overlay(INSTRUMENTS.summary())
+        deadlines.append(cycle.deadline(time.time()))
+    now = time.time()
+    if show_overlay:
+        deadlines.append(now + 1)
+    # pygame.event.wait() treats 0 as "wait forever"
+    timeout = max(1, int((min(deadlines) - now) * 1000))
+
+print(my_disp.fonts.stats())
+print(ICONS.stats())
+print(my_disp.text.stats('Text cache'))
 pygame.quit()
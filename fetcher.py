@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Fetches data on a background thread so the display never waits on it. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import collections
+import syslog
+import threading
+import time
+
+# local imports
+from instrument import INSTRUMENTS
+
+# Seconds to wait before the first retry after a failed fetch. The wait is
+# doubled after each further failure, up to the fetcher's max_backoff.
+RETRY_DELAY = 15
+
+# An immutable view of the latest fetch. `data` and `fetched_at` belong to the
+# last successful fetch and are kept when later fetches fail.
+Snapshot = collections.namedtuple(
+    'Snapshot', ['data', 'fetched_at', 'error', 'failures', 'next_attempt'])
+
+
+class BackgroundFetcher(threading.Thread):
+    """
+    Calls fetch(timeout) on its own thread every `interval` seconds and
+    publishes the result as a new Snapshot. Readers only ever look at
+    `snapshot`, which is replaced in a single assignment. on_update(name),
+    if given, is called on this thread after each successful fetch.
+    """
+    def __init__(self, name, fetch, interval, timeout, max_backoff,
+                 on_update=None):
+        super().__init__(name=name, daemon=True)
+        self.fetch = fetch
+        self.on_update = on_update
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.snapshot = Snapshot(None, 0, None, 0, 0)
+        # Fetches made and failed since the start, for metrics
+        self.attempts = 0
+        self.errors = 0
+        self.attempted = threading.Event()
+        self.wakeup = threading.Event()
+
+    # Publish data fetched earlier (e.g. read back from disk) before the
+    # thread starts. The first fetch is put off until that data is
+    # `interval` seconds old; data that is already older does not count as
+    # a first attempt, so startup still waits for a fresh fetch.
+    def seed(self, data, fetched_at):
+        next_attempt = fetched_at + self.interval
+        self.snapshot = Snapshot(data, fetched_at, None, 0, next_attempt)
+        if next_attempt > time.time():
+            self.attempted.set()
+
+    def ensure_started(self):
+        if not self.is_alive():
+            self.start()
+
+    # Skip the rest of the current wait and fetch right away.
+    def refresh(self):
+        self.wakeup.set()
+
+    # Block until the first fetch has either succeeded or failed.
+    def wait_for_first_attempt(self, timeout=None):
+        return self.attempted.wait(timeout)
+
+    def age(self):
+        if not self.snapshot.fetched_at:
+            return None
+        return time.time() - self.snapshot.fetched_at
+
+    def run(self):
+        self.wakeup.wait(max(0, self.snapshot.next_attempt - time.time()))
+        self.wakeup.clear()
+        while True:
+            old = self.snapshot
+            try:
+                with INSTRUMENTS.span('fetch %s' % self.name):
+                    data = self.fetch(self.timeout)
+            except Exception as e:
+                self.errors += 1
+                failures = old.failures + 1
+                delay = min(RETRY_DELAY * 2 ** (failures - 1),
+                            self.max_backoff)
+                print('Error fetching %s: %s' % (self.name, e))
+                syslog.syslog('Error fetching %s: %s. Retrying in %d seconds.'
+                              % (self.name, e, delay))
+                self.snapshot = Snapshot(old.data, old.fetched_at, str(e),
+                                         failures, time.time() + delay)
+            else:
+                delay = self.interval
+                self.snapshot = Snapshot(data, round(time.time()), None, 0,
+                                         time.time() + delay)
+                if self.on_update is not None:
+                    self.on_update(self.name)
+            self.attempts += 1
+            self.attempted.set()
+            self.wakeup.wait(delay)
+            self.wakeup.clear()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Speedtest history kept in SQLite, for trends over weeks of results. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import argparse
+import collections
+import datetime
+import json
+import os
+import sqlite3
+import syslog
+
+# Min, average and max of each value over one span of time, see summary()
+Bucket = collections.namedtuple(
+    'Bucket', ['start', 'count',
+               'download_min', 'download_avg', 'download_max',
+               'upload_min', 'upload_avg', 'upload_max',
+               'ping_min', 'ping_avg', 'ping_max'])
+
+
+def result_row(result):
+    """
+    Turns a speedtest-cli --json result into (time, download, upload, ping)
+    with time as a Unix timestamp and speeds in Mb/s.
+    """
+    utc_dt = datetime.datetime.strptime(result['timestamp'],
+                                        "%Y-%m-%dT%H:%M:%S.%fZ")
+    timestamp = utc_dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+    return (int(timestamp), result['download'] / 1000000,
+            result['upload'] / 1000000, result['ping'])
+
+
+class SpeedtestHistory:
+    """
+    Every speedtest result in one SQLite table keyed by the time of the
+    test, so results can be read back by time range, or summarized, without
+    touching the files they came from. Adding a result that is already
+    recorded does nothing.
+    """
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS speedtests ('
+                        'time INTEGER PRIMARY KEY, download REAL, '
+                        'upload REAL, ping REAL)')
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    # Records one result. Returns True if it was not recorded yet.
+    def add(self, result):
+        cursor = self.db.execute(
+            'INSERT OR IGNORE INTO speedtests VALUES (?, ?, ?, ?)',
+            result_row(result))
+        return cursor.rowcount == 1
+
+    # Records results that were already loaded. Returns the number of results
+    # that were not recorded yet.
+    def add_all(self, results):
+        added = sum(self.add(result) for result in results)
+        self.db.commit()
+        return added
+
+    def ingest(self, paths):
+        """
+        Records the results in the given files. Returns the number of
+        results that were not recorded yet.
+        """
+        added = 0
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    added += self.add(json.load(f))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                syslog.syslog('Unable to record %s: %s' % (path, e))
+        self.db.commit()
+        return added
+
+    # The time of the newest result and the number of results, or
+    # (None, 0) without any.
+    def latest(self):
+        return self.db.execute(
+            'SELECT MAX(time), COUNT(*) FROM speedtests').fetchone()
+
+    # The newest result as a speedtest-cli result with only the fields the
+    # speedtest screen shows, or None without any.
+    def latest_result(self):
+        row = self.db.execute('SELECT * FROM speedtests '
+                              'ORDER BY time DESC LIMIT 1').fetchone()
+        if row is None:
+            return None
+        timestamp, download, upload, ping = row
+        return {'timestamp': datetime.datetime.fromtimestamp(
+                    timestamp, datetime.timezone.utc).strftime(
+                        "%Y-%m-%dT%H:%M:%S.%fZ"),
+                'download': download * 1000000,
+                'upload': upload * 1000000,
+                'ping': ping}
+
+    # Every result from start up to end, as (time, download, upload, ping).
+    def range(self, start, end):
+        return self.db.execute(
+            'SELECT * FROM speedtests WHERE time >= ? AND time < ? '
+            'ORDER BY time', (int(start), int(end))).fetchall()
+
+    def summary(self, start, end, bucket):
+        """
+        Summarizes the results from start up to end in buckets of `bucket`
+        seconds counted from start, e.g. 3600 for hourly or 86400 for daily
+        numbers. Returns a Bucket for every bucket that has results.
+        """
+        rows = self.db.execute(
+            'SELECT (time - :start) / :bucket * :bucket + :start AS bucket, '
+            'COUNT(*), MIN(download), AVG(download), MAX(download), '
+            'MIN(upload), AVG(upload), MAX(upload), '
+            'MIN(ping), AVG(ping), MAX(ping) FROM speedtests '
+            'WHERE time >= :start AND time < :end '
+            'GROUP BY bucket ORDER BY bucket',
+            {'start': int(start), 'end': int(end), 'bucket': int(bucket)})
+        return [Bucket(*row) for row in rows]
+
+
+# The SPEEDTEST_HISTORY file set in speedtest_config.py, or None if results
+# are not recorded, as in config files from before it existed.
+def history_file():
+    import plugin_configs.speedtest_config as speedtest_config
+    return getattr(speedtest_config, 'SPEEDTEST_HISTORY', None)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Add speedtest results, e.g. an archive of them, to '
+                    'the history shown by the trend screen.')
+    parser.add_argument('files', nargs='+', metavar='FILE',
+                        help='speedtest-cli --json results')
+    parser.add_argument('--history',
+                        default=history_file(),
+                        help='history file (default: %(default)s)')
+    args = parser.parse_args()
+    if not args.history:
+        parser.error('SPEEDTEST_HISTORY is not set, give --history')
+
+    history = SpeedtestHistory(args.history)
+    added = history.ingest(args.files)
+    print('Added %d of %d results to %s'
+          % (added, len(args.files), args.history))
+
+
+if __name__ == '__main__':
+    main()
@@ -41,78 +41,22 @@ from weather import *
 
 
 class Hourly(Weather):
+    # Data sources this screen draws from and how old (in seconds) they may be
+    DATA_SOURCES = {'forecast': config.DS_CHECK_INTERVAL}
+
     def get_hourly(self, last_update_time):
         new_last_update_time = self.get_forecast(last_update_time)
         return new_last_update_time
 
     def disp_hourly(self, last_update_time):
-        # Fill the screen with black
-        self.screen.fill((0, 0, 0))
-        xmin = 10
-        lines = 5
-        line_color = (255, 255, 255)
-        text_color = (255, 255, 255)
-        font_name = "freesans"
-
-        self.draw_screen_border(line_color, xmin, lines)
-        self.disp_time_date(font_name, text_color)
-        self.disp_current_temp(font_name, text_color)
-        self.disp_summary()
-        self.display_conditions_line(
-            'Feels Like:', int(round(self.weather.apparentTemperature)),
-            True)
-
-        try:
-            wind_bearing = self.weather.windBearing
-            wind_direction = deg_to_compass(wind_bearing) + ' @ '
-        except AttributeError:
-            wind_direction = ''
-        wind_txt = wind_direction + str(
-            int(round(self.weather.windSpeed))) + \
-            ' ' + get_windspeed_abbreviation()
-        self.display_conditions_line(
-            'Wind:', wind_txt, False, 1)
-
-        self.display_conditions_line(
-            'Humidity:', str(int(round((self.weather.humidity * 100)))) + '%',
-            False, 2)
-
-        # Skipping multiplier 3 (line 4)
-
-        if self.take_umbrella:
-            umbrella_txt = 'Grab your umbrella!'
-        else:
-            umbrella_txt = 'No umbrella needed today.'
-        self.disp_umbrella_info(umbrella_txt)
-
-        # Current hour
-        this_hour = self.weather.hourly[0]
-        this_hour_24_int = int(datetime.datetime.fromtimestamp(
-            this_hour.time).strftime("%H"))
-        if this_hour_24_int <= 11:
-            ampm = 'a.m.'
-        else:
-            ampm = 'p.m.'
-        this_hour_12_int = int(datetime.datetime.fromtimestamp(
-            this_hour.time).strftime("%I"))
-        this_hour_string = "{} {}".format(str(this_hour_12_int), ampm)
-        multiplier = 1
-        self.display_subwindow(this_hour, this_hour_string, multiplier)
+        self.compose(('hourly', last_update_time, self.stale_minutes()),
+                     self.draw_hourly,
+                     self.clock_key(), self.draw_clock)
 
-        # counts from 0 to 2
-        for future_hour in range(3):
-            this_hour = self.weather.hourly[future_hour + 1]
-            this_hour_24_int = int(datetime.datetime.fromtimestamp(
-                this_hour.time).strftime("%H"))
-            if this_hour_24_int <= 11:
-                ampm = 'a.m.'
-            else:
-                ampm = 'p.m.'
-            this_hour_12_int = int(datetime.datetime.fromtimestamp(
-                this_hour.time).strftime("%I"))
-            this_hour_string = "{} {}".format(str(this_hour_12_int), ampm)
-            multiplier += 2
-            self.display_subwindow(this_hour, this_hour_string, multiplier)
+    # Everything on this screen except the clock.
+    def draw_hourly(self):
+        self.draw_forecast(self.view.hours)
 
-        # Update the display
-        pygame.display.update()
+    # Entry points used by the main loop, see plugins.py
+    fetch = get_hourly
+    render = disp_hourly
@@ -47,19 +47,27 @@ from weather_rock_methods import *
 from weather import *
 
 
-class Info:
+class Info(Weather):
+    # Data sources this screen draws from and how old (in seconds) they may be
+    DATA_SOURCES = {'forecast': config.DS_CHECK_INTERVAL}
+
     def get_info(self, last_update_time):
-        return get_forecast(last_update_time)
+        return self.get_forecast(last_update_time)
 
     def sPrint(self, text, font, x, line_number, text_color):
         rendered_font = font.render(text, True, text_color)
         self.screen.blit(rendered_font, (x, self.ymax * 0.075 * line_number))
 
     def disp_info(self, last_update_time):
+        # The countdown to sunrise/sunset changes with the clock, so the
+        # whole screen is redrawn once a minute.
+        self.compose(('info', last_update_time, self.clock_key()),
+                     lambda: self.draw_info(last_update_time))
+
+    @timed('draw info')
+    def draw_info(self, last_update_time):
         (in_daylight, day_hrs, day_mins, seconds_til_daylight,
          delta_seconds_til_dark) = self.daylight(self.weather)
-        # Fill the screen with black
-        self.screen.fill((0, 0, 0))
         xmin = 10
         lines = 5
         line_color = (0, 0, 0)
@@ -83,10 +91,10 @@ class Info:
         time_height_small = self.time_date_small_text_height
 
         # Time & Date
-        regular_font = pygame.font.SysFont(
-            font_name, int(self.ymax * time_height_large), bold=1)
-        small_font = pygame.font.SysFont(
-            font_name, int(self.ymax * time_height_small), bold=1)
+        regular_font = self.fonts.get(
+            font_name, int(self.ymax * time_height_large))
+        small_font = self.fonts.get(
+            font_name, int(self.ymax * time_height_small))
 
         hours_and_minutes = time.strftime("%I:%M", time.localtime())
         am_pm = time.strftime(" %p", time.localtime())
@@ -103,8 +111,9 @@ class Info:
         self.screen.blit(rendered_am_pm,
                          (tp + tx1 + 3, self.time_date_small_y_position))
 
-        self.sPrint("A weather rock powered by Dark Sky", small_font,
-                    self.xmax * 0.05, 3, text_color)
+        self.sPrint("A weather rock powered by %s"
+                    % self.forecast.provider.attribution,
+                    small_font, self.xmax * 0.05, 3, text_color)
 
         self.sPrint("Sunrise: %s" % self.sunrise_string,
                     small_font, self.xmax * 0.05, 4, text_color)
@@ -133,5 +142,11 @@ class Info:
             time.localtime(last_update_time))
         self.sPrint(text, small_font, self.xmax * 0.05, 11, text_color)
 
-        # Update the display
-        pygame.display.update()
+        text = "    %d min ago" % ((time.time() - last_update_time) // 60)
+        if self.forecast.fetcher.snapshot.error:
+            text += ", last update failed"
+        self.sPrint(text, small_font, self.xmax * 0.05, 12, text_color)
+
+    # Entry points used by the main loop, see plugins.py
+    fetch = get_info
+    render = disp_info
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Timing spans, rolling histograms and profiling for the render loop. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import bisect
+import collections
+import contextlib
+import cProfile
+import functools
+import io
+import os
+import pstats
+import syslog
+import tempfile
+import time
+
+# Durations kept per span; older ones roll out of the histogram.
+WINDOW = 500
+# Upper bounds (in seconds) of the buckets every duration is counted in,
+# for exporting histograms, see metrics.py
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+           5, 10)
+# Functions listed in syslog when a profile capture stops
+PROFILE_LINES = 25
+
+
+class Histogram:
+    """
+    The last WINDOW durations (in seconds) of one span. Percentiles are
+    only worked out when asked for, so recording stays cheap. Every
+    duration ever added is also counted in `buckets` (the first bucket in
+    BUCKETS it fits in, or none) and in `total`.
+    """
+    def __init__(self):
+        self.durations = collections.deque(maxlen=WINDOW)
+        self.count = 0
+        self.total = 0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds):
+        self.durations.append(seconds)
+        self.count += 1
+        self.total += seconds
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        if bucket < len(BUCKETS):
+            self.buckets[bucket] += 1
+
+    def percentile(self, percent):
+        ordered = sorted(self.durations)
+        if not ordered:
+            return 0
+        return ordered[min(len(ordered) - 1,
+                           int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+class Span:
+    def __init__(self, instruments, name):
+        self.instruments = instruments
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.instruments.record(self.name, time.perf_counter() - self.start)
+
+
+class Instruments:
+    """
+    Named timing histograms for everything the render loop does. Nothing is
+    recorded until `enabled` is set; until then span() hands out a shared
+    do-nothing context manager and timed functions only check the flag.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {}
+        self.profile = None
+        self.null_span = contextlib.nullcontext()
+
+    def record(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, Histogram())
+        histogram.add(seconds)
+
+    # Times the body of a with block.
+    def span(self, name):
+        if not self.enabled:
+            return self.null_span
+        return Span(self, name)
+
+    def clear(self):
+        self.histograms = {}
+
+    # One line per span, slowest first by p99.
+    def summary(self):
+        rows = []
+        for name, histogram in list(self.histograms.items()):
+            rows.append((histogram.percentile(99), name, histogram))
+        rows.sort(reverse=True)
+        lines = []
+        for p99, name, histogram in rows:
+            lines.append('%-20s n=%-6d p50 %7.2f  p99 %7.2f  max %7.2f ms' % (
+                name, histogram.count, histogram.percentile(50) * 1000,
+                p99 * 1000, max(histogram.durations) * 1000))
+        return lines
+
+    # Starts a cProfile capture, or stops the running one, saves it next to
+    # other temporary files and logs the most expensive functions. Can be
+    # used as a signal handler.
+    def toggle_profile(self, signum=None, frame=None):
+        if self.profile is None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            syslog.syslog('Profiling started')
+            return
+        self.profile.disable()
+        filename = os.path.join(
+            tempfile.gettempdir(), 'piweatherrock-%s.prof'
+            % time.strftime("%Y-%m-%dT%H.%M.%S", time.localtime()))
+        self.profile.dump_stats(filename)
+        report = io.StringIO()
+        pstats.Stats(self.profile, stream=report).sort_stats(
+            'cumulative').print_stats(PROFILE_LINES)
+        for line in report.getvalue().splitlines():
+            if line.strip():
+                syslog.syslog(line)
+        syslog.syslog('Profile saved to %s' % filename)
+        self.profile = None
+
+
+# The instruments shared by the whole program.
+INSTRUMENTS = Instruments()
+
+
+def timed(name):
+    """
+    Decorator recording how long each call takes under the given span name,
+    while INSTRUMENTS is enabled.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENTS.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                INSTRUMENTS.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
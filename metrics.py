@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Serves render, fetch and cache statistics as Prometheus text metrics. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import http.server
+import os
+import threading
+
+# local imports
+from dial import DIALS
+from instrument import BUCKETS, INSTRUMENTS
+from providers import TRANSFERS
+from scheduler import SCHEDULER
+from weather import ICONS
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    # Give up on clients that stop sending, so they can not hold the server
+    timeout = 5
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.collect().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Requests are not worth a line each in the log
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(threading.Thread):
+    """
+    Answers GET /metrics with the text returned by collect(), on its own
+    thread. The render loop never waits for it: everything collect() reads
+    is only ever replaced or counted up by the render loop and the fetchers,
+    without locks.
+    """
+    def __init__(self, address, port, collect):
+        super().__init__(name='metrics', daemon=True)
+        handler = type('Handler', (MetricsHandler,),
+                       {'collect': staticmethod(collect)})
+        self.httpd = http.server.HTTPServer((address, port), handler)
+
+    def run(self):
+        self.httpd.serve_forever()
+
+
+def add_metric(lines, name, kind, help_text, samples):
+    lines.append('# HELP %s %s' % (name, help_text))
+    lines.append('# TYPE %s %s' % (name, kind))
+    for labels, value in samples:
+        if labels:
+            labels = '{%s}' % ','.join(
+                '%s="%s"' % label for label in sorted(labels.items()))
+        lines.append('%s%s %s' % (name, labels or '', value))
+
+
+# Resident set size of this process in bytes, or None off Linux.
+def resident_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def collect_metrics(display, screen_switches):
+    """
+    Returns the current metrics in the Prometheus text format. display is
+    the MyDisplay whose caches are reported and screen_switches counts how
+    often each screen was switched to.
+    """
+    lines = []
+
+    samples = []
+    for span, histogram in list(INSTRUMENTS.histograms.items()):
+        count = 0
+        for bound, bucket in zip(BUCKETS, list(histogram.buckets)):
+            count += bucket
+            samples.append(({'span': span, 'le': str(bound)}, count))
+        samples.append(({'span': span, 'le': '+Inf'}, histogram.count))
+    add_metric(lines, 'piweatherrock_span_seconds', 'histogram',
+               'Time spent fetching, building and drawing.', samples)
+    # The _sum and _count series belong to the histogram above
+    for span, histogram in list(INSTRUMENTS.histograms.items()):
+        lines.append('piweatherrock_span_seconds_sum{span="%s"} %f'
+                     % (span, histogram.total))
+        lines.append('piweatherrock_span_seconds_count{span="%s"} %d'
+                     % (span, histogram.count))
+
+    fetchers = list(SCHEDULER.fetchers.items())
+    add_metric(lines, 'piweatherrock_fetch_attempts_total', 'counter',
+               'Background fetches made.',
+               [({'source': name}, f.attempts) for name, f in fetchers])
+    add_metric(lines, 'piweatherrock_fetch_errors_total', 'counter',
+               'Background fetches that failed.',
+               [({'source': name}, f.errors) for name, f in fetchers])
+    add_metric(lines, 'piweatherrock_fetch_consecutive_failures', 'gauge',
+               'Fetches that failed since the last one that worked.',
+               [({'source': name}, f.snapshot.failures)
+                for name, f in fetchers])
+    add_metric(lines, 'piweatherrock_data_age_seconds', 'gauge',
+               'Age of the data shown from each source.',
+               [({'source': name}, '%.0f' % f.age())
+                for name, f in fetchers if f.age() is not None])
+
+    add_metric(lines, 'piweatherrock_http_requests_total', 'counter',
+               'Forecast requests made.', [({}, TRANSFERS.requests)])
+    add_metric(lines, 'piweatherrock_http_not_modified_total', 'counter',
+               'Forecast requests answered with 304 Not Modified.',
+               [({}, TRANSFERS.not_modified)])
+    add_metric(lines, 'piweatherrock_http_received_bytes_total', 'counter',
+               'Forecast bytes received, as sent and after decompression.',
+               [({'encoding': 'wire'}, TRANSFERS.wire_bytes),
+                ({'encoding': 'identity'}, TRANSFERS.body_bytes)])
+    add_metric(lines, 'piweatherrock_http_connections_total', 'counter',
+               'HTTPS connections opened for forecasts.',
+               [({}, TRANSFERS.connections)])
+    add_metric(lines, 'piweatherrock_http_connect_seconds_total', 'counter',
+               'Time spent on DNS, TCP connects and TLS handshakes.',
+               [({}, '%f' % TRANSFERS.connect_seconds)])
+
+    forecast = SCHEDULER.snapshot('forecast').data
+    if forecast is not None:
+        stats = forecast.stats
+        add_metric(lines, 'piweatherrock_rain_hours_in_daylight', 'gauge',
+                   'Daylight hours left today likely to have rain.',
+                   [({}, stats.rain_hours_in_daylight)])
+        if stats.max_gust is not None:
+            add_metric(lines, 'piweatherrock_max_gust', 'gauge',
+                       'Strongest wind gust in the next 24 hours.',
+                       [({}, stats.max_gust)])
+
+    add_metric(lines, 'piweatherrock_screen_switches_total', 'counter',
+               'Times each screen was switched to.',
+               [({'screen': screen}, count)
+                for screen, count in list(screen_switches.items())])
+
+    caches = [('fonts', display.fonts), ('icons', ICONS),
+              ('text', display.text), ('dial', DIALS)]
+    add_metric(lines, 'piweatherrock_cache_hits_total', 'counter',
+               'Lookups answered from a cache.',
+               [({'cache': name}, cache.hits) for name, cache in caches])
+    add_metric(lines, 'piweatherrock_cache_misses_total', 'counter',
+               'Lookups a cache had to load or render.',
+               [({'cache': name}, cache.misses) for name, cache in caches])
+    add_metric(lines, 'piweatherrock_cache_hit_ratio', 'gauge',
+               'Share of lookups answered from a cache.',
+               [({'cache': name}, '%.4f' % (
+                   cache.hits / (cache.hits + cache.misses)))
+                for name, cache in caches if cache.hits + cache.misses])
+    add_metric(lines, 'piweatherrock_cache_bytes', 'gauge',
+               'Pixel memory held by a surface cache.',
+               [({'cache': 'text'}, display.text.bytes),
+                ({'cache': 'dial'}, DIALS.bytes)])
+
+    rss = resident_bytes()
+    if rss is not None:
+        add_metric(lines, 'process_resident_memory_bytes', 'gauge',
+                   'Resident memory size in bytes.', [({}, rss)])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" The screens that can be shown and how to load them. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import importlib
+import syslog
+import time
+import types
+
+# Every screen that can be listed in config.PLUGINS, plus the info screen,
+# as the module and class that implement it. Modules are only imported when
+# their screen is first used.
+REGISTRY = {
+    'daily': ('daily', 'Daily'),
+    'hourly': ('hourly', 'Hourly'),
+    'info': ('info', 'Info'),
+    'speedtest': ('speedtest', 'Speedtest'),
+    'trend': ('trend', 'Trend'),
+}
+
+# Settings of the screens that also work without a
+# plugin_configs/<name>_config.py, the defaults of its sample file.
+DEFAULT_CONFIGS = {
+    'trend': {'PAUSE': 15, 'DAYS': 28, 'BUCKET_HOURS': 24},
+}
+
+
+class Plugins(dict):
+    """
+    Plugin objects by name, all drawing on the same display. A plugin is
+    created, and its module imported, the first time it is looked up, so
+    screens that are not due yet cost nothing at startup. Each plugin gets
+    its settings from plugin_configs/<name>_config.py. on_load(name, plugin),
+    if given, is called once for every plugin that gets created.
+    """
+    def __init__(self, names, display, on_load=None):
+        super().__init__()
+        for name in names:
+            if name not in REGISTRY:
+                raise ValueError('Unknown plugin: %s' % name)
+        self.names = list(names)
+        self.display = display
+        self.on_load = on_load
+        # Seconds spent importing and creating each plugin
+        self.load_times = {}
+
+    def __missing__(self, name):
+        if name not in self.names:
+            raise KeyError(name)
+        start = time.perf_counter()
+        module_name, class_name = REGISTRY[name]
+        plugin_class = getattr(importlib.import_module(module_name),
+                               class_name)
+        plugin = plugin_class(name, self.display, self.config(name))
+        self[name] = plugin
+        self.load_times[name] = time.perf_counter() - start
+        syslog.syslog('Loaded %s plugin in %.3f seconds'
+                      % (name, self.load_times[name]))
+        if self.on_load is not None:
+            self.on_load(name, plugin)
+        return plugin
+
+    # The settings of a plugin, without loading the plugin itself.
+    def config(self, name):
+        module_name = 'plugin_configs.%s_config' % name
+        try:
+            return importlib.import_module(module_name)
+        except ModuleNotFoundError as e:
+            if e.name != module_name or name not in DEFAULT_CONFIGS:
+                raise
+            return types.SimpleNamespace(**DEFAULT_CONFIGS[name])
+
+    # Import and create the given plugins now instead of on first use.
+    def load(self, *names):
+        for name in names:
+            self[name]
+
+    def load_all(self):
+        self.load(*self.names)
+
+
+def load_plugins(names, display, on_load=None):
+    return Plugins(names, display, on_load)
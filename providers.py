@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Weather providers, each returning forecasts in one normalized model. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import copy
+import datetime
+import glob
+import json
+import os
+import syslog
+import time
+
+# third party imports
+import requests
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPSConnectionPool
+
+# local imports
+import config
+from instrument import INSTRUMENTS
+
+# Returned by Provider.fetch() when the forecast has not changed since the
+# last fetch, see HTTPProvider.get()
+NOT_MODIFIED = object()
+
+
+class TransferStats:
+    """
+    Running totals for all HTTP requests made for forecasts.
+    """
+    def __init__(self):
+        self.requests = 0
+        self.not_modified = 0
+        # Bytes as received, before and after gzip decompression
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        # New connections made, and the time spent on DNS, TCP and TLS
+        self.connections = 0
+        self.connect_seconds = 0
+
+
+TRANSFERS = TransferStats()
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    # Opening a connection covers the DNS lookup, TCP connect and TLS
+    # handshake, which is what keep-alive saves.
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        seconds = time.perf_counter() - start
+        TRANSFERS.connections += 1
+        TRANSFERS.connect_seconds += seconds
+        INSTRUMENTS.record('https connect', seconds)
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(requests.adapters.HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(
+            self.poolmanager.pool_classes_by_scheme,
+            https=TimedHTTPSConnectionPool)
+
+
+# One session for all forecast requests, so the HTTPS connection (and its
+# TLS handshake) is kept alive from one fetch to the next. requests asks for
+# gzip by default. Every location shown has its own fetcher thread, so one
+# connection is kept for each display that could be at another location.
+SESSION = requests.Session()
+SESSION.mount('https://', TimedAdapter(
+    pool_connections=2, pool_maxsize=1 + len(getattr(config, 'DISPLAYS', []))))
+
+
+class Provider:
+    """
+    Fetches forecasts for a location (lat, lon), config.LAT/LON unless
+    given, in config.UNITS. Whatever the source is, forecasts come out in
+    one normalized model: a Dark Sky style
+    response (field names, icon names and units as in
+    https://darksky.net/dev/docs) holding only the given records.Fields, so
+    the unit, icon and umbrella logic never depend on the provider.
+
+    fetch() returns the raw response, which is what gets cached on disk,
+    and normalize() turns a raw response into the Dark Sky shape.
+    """
+    name = None
+    # Shown on the info screen
+    attribution = None
+
+    def __init__(self, fields, location=None):
+        self.fields = fields
+        self.lat, self.lon = location or (config.LAT, config.LON)
+
+    def fetch(self, timeout):
+        raise NotImplementedError
+
+    # Makes the next fetch return a full response.
+    def forget(self):
+        pass
+
+    def normalize(self, raw):
+        return raw
+
+    def parse(self, raw):
+        return self.fields.build(self.normalize(raw))
+
+
+class HTTPProvider(Provider):
+    """
+    A provider that fetches JSON over HTTP with the shared SESSION. The ETag
+    and Last-Modified headers of the last response are sent back, so a
+    server that supports it can answer 304 Not Modified, and fetch() then
+    returns NOT_MODIFIED without reading or parsing a body.
+    """
+    def __init__(self, fields, location=None):
+        super().__init__(fields, location)
+        self.etag = None
+        self.last_modified = None
+
+    def forget(self):
+        self.etag = None
+        self.last_modified = None
+
+    # pairs_hook is passed on to json.loads() to filter the response as it is
+    # decoded, see records.Fields.keep().
+    def get(self, url, timeout, params=None, pairs_hook=None):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        connections = TRANSFERS.connections
+        response = SESSION.get(url, params=params, headers=headers,
+                               timeout=timeout)
+        TRANSFERS.requests += 1
+        TRANSFERS.wire_bytes += response.raw.tell()
+        TRANSFERS.body_bytes += len(response.content)
+        if TRANSFERS.connections == connections:
+            connection = 'reused connection'
+        else:
+            connection = 'new connection'
+        syslog.syslog('%s answered %d in %.2f s, %d bytes (%d unpacked), %s'
+                      % (self.name, response.status_code,
+                         response.elapsed.total_seconds(),
+                         response.raw.tell(), len(response.content),
+                         connection))
+        if response.status_code == 304:
+            TRANSFERS.not_modified += 1
+            return NOT_MODIFIED
+        response.raise_for_status()
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        return response.json(object_pairs_hook=pairs_hook)
+
+
+class DarkSkyProvider(HTTPProvider):
+    name = 'darksky'
+    attribution = 'Dark Sky'
+    url = 'https://api.darksky.net/forecast/{key}/{lat},{lon}'
+
+    def fetch(self, timeout):
+        syslog.syslog("Fetching update from DarkSky")
+        return self.get(
+            self.url.format(key=config.DS_API_KEY, lat=self.lat,
+                            lon=self.lon),
+            timeout,
+            params={'exclude': 'minutely,alerts', 'units': config.UNITS,
+                    'lang': config.LANG},
+            pairs_hook=self.fields.keep)
+
+
+# Open-Meteo units matching each Dark Sky unit system:
+# (temperature_unit, wind_speed_unit, precipitation_unit)
+OPEN_METEO_UNITS = {
+    'us': ('fahrenheit', 'mph', 'inch'),
+    'si': ('celsius', 'ms', 'mm'),
+    'ca': ('celsius', 'kmh', 'mm'),
+    'uk2': ('celsius', 'mph', 'mm'),
+}
+
+# WMO weather codes used by Open-Meteo, as a summary and a Dark Sky icon.
+# Icons ending in '-day' get '-night' after sunset.
+WMO_CODES = {
+    0: ('Clear', 'clear-day'),
+    1: ('Mainly Clear', 'clear-day'),
+    2: ('Partly Cloudy', 'partly-cloudy-day'),
+    3: ('Overcast', 'cloudy'),
+    45: ('Foggy', 'fog'),
+    48: ('Freezing Fog', 'fog'),
+    51: ('Light Drizzle', 'rain'),
+    53: ('Drizzle', 'rain'),
+    55: ('Heavy Drizzle', 'rain'),
+    56: ('Freezing Drizzle', 'sleet'),
+    57: ('Freezing Drizzle', 'sleet'),
+    61: ('Light Rain', 'rain'),
+    63: ('Rain', 'rain'),
+    65: ('Heavy Rain', 'rain'),
+    66: ('Freezing Rain', 'sleet'),
+    67: ('Freezing Rain', 'sleet'),
+    71: ('Light Snow', 'snow'),
+    73: ('Snow', 'snow'),
+    75: ('Heavy Snow', 'snow'),
+    77: ('Snow Grains', 'snow'),
+    80: ('Rain Showers', 'rain'),
+    81: ('Rain Showers', 'rain'),
+    82: ('Heavy Rain Showers', 'rain'),
+    85: ('Snow Showers', 'snow'),
+    86: ('Heavy Snow Showers', 'snow'),
+    95: ('Thunderstorm', 'rain'),
+    96: ('Thunderstorm with Hail', 'rain'),
+    99: ('Thunderstorm with Hail', 'rain'),
+}
+
+
+def wmo_summary(code, is_day=True):
+    summary, icon = WMO_CODES.get(code, ('Unknown', 'unknown'))
+    if not is_day and icon.endswith('-day'):
+        icon = icon[:-len('-day')] + '-night'
+    return summary, icon
+
+
+# Open-Meteo gives null for these where its weather model has no value. The
+# screens show them and Dark Sky always has them, so null counts as no rain.
+ZERO_IF_NULL = ('precipProbability', 'precipIntensity')
+
+
+# Copies the fields that have a value into a Dark Sky data point, applying
+# scale to the ones listed in scaled (e.g. percentages to fractions).
+def data_point(fields, scaled=(), scale=1):
+    point = {}
+    for name, value in fields.items():
+        if value is None and name in ZERO_IF_NULL:
+            value = 0.0
+        if value is not None:
+            point[name] = value * scale if name in scaled else value
+    return point
+
+
+class OpenMeteoProvider(HTTPProvider):
+    """
+    https://open-meteo.com/ forecasts. Free for non-commercial use and needs
+    no API key.
+    """
+    name = 'openmeteo'
+    attribution = 'Open-Meteo.com'
+    url = 'https://api.open-meteo.com/v1/forecast'
+    current = ('temperature_2m', 'relative_humidity_2m',
+               'apparent_temperature', 'weather_code', 'wind_speed_10m',
+               'wind_direction_10m', 'is_day')
+    hourly = ('temperature_2m', 'apparent_temperature',
+              'relative_humidity_2m', 'precipitation_probability',
+              'precipitation', 'weather_code', 'wind_speed_10m',
+              'wind_gusts_10m', 'is_day')
+    daily = ('weather_code', 'temperature_2m_max', 'temperature_2m_min',
+             'sunrise', 'sunset', 'precipitation_probability_max',
+             'precipitation_sum', 'wind_gusts_10m_max')
+
+    def fetch(self, timeout):
+        syslog.syslog("Fetching update from Open-Meteo")
+        temperature, wind_speed, precipitation = OPEN_METEO_UNITS[
+            config.UNITS]
+        return self.get(self.url, timeout, params={
+            'latitude': self.lat,
+            'longitude': self.lon,
+            'current': ','.join(self.current),
+            'hourly': ','.join(self.hourly),
+            'daily': ','.join(self.daily),
+            'temperature_unit': temperature,
+            'wind_speed_unit': wind_speed,
+            'precipitation_unit': precipitation,
+            'timeformat': 'unixtime',
+            'timezone': 'auto',
+            'forecast_days': 8,
+        })
+
+    def normalize(self, raw):
+        current = raw['current']
+        summary, icon = wmo_summary(current['weather_code'],
+                                    current.get('is_day', 1))
+        currently = data_point({
+            'time': current['time'],
+            'summary': summary,
+            'icon': icon,
+            'temperature': current['temperature_2m'],
+            'apparentTemperature': current['apparent_temperature'],
+            'humidity': current['relative_humidity_2m'],
+            'windSpeed': current['wind_speed_10m'],
+            'windBearing': current['wind_direction_10m'],
+        }, ('humidity',), 0.01)
+
+        # Like Dark Sky, start with the current hour and cover two days.
+        hourly = raw['hourly']
+        hours = []
+        for i, hour in enumerate(hourly['time']):
+            if hour + 3600 <= current['time'] or len(hours) == 48:
+                continue
+            summary, icon = wmo_summary(hourly['weather_code'][i],
+                                        hourly['is_day'][i])
+            hours.append(data_point({
+                'time': hour,
+                'summary': summary,
+                'icon': icon,
+                'temperature': hourly['temperature_2m'][i],
+                'apparentTemperature': hourly['apparent_temperature'][i],
+                'humidity': hourly['relative_humidity_2m'][i],
+                'precipProbability': hourly['precipitation_probability'][i],
+                'precipIntensity': hourly['precipitation'][i],
+                'windSpeed': hourly['wind_speed_10m'][i],
+                'windGust': hourly['wind_gusts_10m'][i],
+            }, ('humidity', 'precipProbability'), 0.01))
+
+        daily = raw['daily']
+        days = []
+        for i, day in enumerate(daily['time']):
+            summary, icon = wmo_summary(daily['weather_code'][i])
+            precip_sum = daily['precipitation_sum'][i]
+            days.append(data_point({
+                'time': day,
+                'summary': summary,
+                'icon': icon,
+                'sunriseTime': daily['sunrise'][i],
+                'sunsetTime': daily['sunset'][i],
+                'temperatureHigh': daily['temperature_2m_max'][i],
+                'temperatureLow': daily['temperature_2m_min'][i],
+                'precipProbability':
+                    daily['precipitation_probability_max'][i],
+                # Dark Sky gives the average intensity per hour
+                'precipIntensity':
+                    None if precip_sum is None else precip_sum / 24,
+                'windGust': daily['wind_gusts_10m_max'][i],
+            }, ('precipProbability',), 0.01))
+
+        return {
+            'latitude': raw['latitude'],
+            'longitude': raw['longitude'],
+            'timezone': raw['timezone'],
+            'offset': raw['utc_offset_seconds'] / 3600,
+            'currently': currently,
+            'hourly': {'summary': currently['summary'],
+                       'icon': currently['icon'], 'data': hours},
+            'daily': {'summary': currently['summary'],
+                      'icon': currently['icon'], 'data': days},
+            'flags': {'units': config.UNITS},
+        }
+
+
+class ReplayProvider(Provider):
+    """
+    Serves recorded forecasts in the Dark Sky format from disk, for load
+    tests and benchmarks without a network. `path` is a JSON file, or a
+    directory whose *.json files are served in name order, one per fetch,
+    starting over after the last one. Unless keep_dates is set, all times
+    are moved by whole days so that the recording starts today.
+    """
+    name = 'replay'
+    attribution = 'a recorded forecast'
+
+    def __init__(self, fields, path, keep_dates=False):
+        super().__init__(fields)
+        self.path = path
+        self.keep_dates = keep_dates
+        self.fetches = 0
+
+    def fetch(self, timeout):
+        if os.path.isdir(self.path):
+            files = sorted(glob.glob(os.path.join(self.path, '*.json')))
+            if not files:
+                raise IOError('No recorded forecasts in %s' % self.path)
+            filename = files[self.fetches % len(files)]
+        else:
+            filename = self.path
+        self.fetches += 1
+        with open(filename) as f:
+            return json.load(f, object_pairs_hook=self.fields.keep)
+
+    def normalize(self, raw):
+        if self.keep_dates:
+            return raw
+        recorded = datetime.date.fromtimestamp(raw['currently']['time'])
+        days = (datetime.date.today() - recorded).days
+        return shift_times(copy.deepcopy(raw), days * 86400)
+
+
+# Moves every timestamp ('time', 'sunriseTime', ...) in a Dark Sky response
+# by the given number of seconds, in place.
+def shift_times(data, seconds):
+    if isinstance(data, dict):
+        for name, value in data.items():
+            if (name == 'time' or name.endswith('Time')) and isinstance(
+                    value, (int, float)):
+                data[name] = value + seconds
+            else:
+                shift_times(value, seconds)
+    elif isinstance(data, list):
+        for value in data:
+            shift_times(value, seconds)
+    return data
+
+
+PROVIDERS = {
+    'darksky': DarkSkyProvider,
+    'openmeteo': OpenMeteoProvider,
+    'replay': ReplayProvider,
+}
+
+
+# Recorded forecasts are the same for every location.
+def make_provider(name, fields, location=None):
+    if name not in PROVIDERS:
+        raise ValueError('Unknown weather provider: %s' % name)
+    if name == 'replay':
+        return ReplayProvider(fields, getattr(
+            config, 'REPLAY_FILE', 'example/darksky_forecast.json'))
+    return PROVIDERS[name](fields, location)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Compact forecast records holding only the fields the screens read. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+
+class Record:
+    """
+    A data point holding a fixed set of fields in __slots__. Fields missing
+    from the response are left unset, so hasattr() and getattr() with a
+    default behave as they did with darksky's DataPoint.
+    """
+    __slots__ = ()
+
+    def __init__(self, values):
+        for name in self.__slots__:
+            if name in values:
+                setattr(self, name, values[name])
+
+
+def record_type(name, fields):
+    return type(name, (Record,), {'__slots__': tuple(fields)})
+
+
+class Block:
+    """
+    An hourly or daily data block: its summary and icon, and a tuple of
+    records that can be indexed, sliced and iterated over.
+    """
+    __slots__ = ('summary', 'icon', 'data')
+
+    def __init__(self, block, point_type):
+        self.summary = block.get('summary')
+        self.icon = block.get('icon')
+        self.data = tuple(point_type(point) for point in block.get('data', ()))
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __len__(self):
+        return len(self.data)
+
+
+class Fields:
+    """
+    The fields kept from a Dark Sky style response: those of currently, and
+    those of each hourly and daily data point. The fields of currently are
+    read straight off the forecast, e.g. forecast.temperature, as with
+    darksky's Forecast; the blocks are forecast.hourly and forecast.daily.
+
+    keep() is an object_pairs_hook for json.load(s), so that everything
+    else (minutely, alerts, flags, ozone, ...) is dropped while the response
+    is decoded instead of being held in memory until it is parsed.
+    """
+    def __init__(self, currently, hourly, daily):
+        self.forecast_type = record_type(
+            'Forecast', tuple(currently) + ('hourly', 'daily'))
+        self.point_types = {'hourly': record_type('Hour', hourly),
+                            'daily': record_type('Day', daily)}
+        self.names = frozenset(
+            tuple(currently) + tuple(hourly) + tuple(daily) +
+            ('currently', 'hourly', 'daily') + Block.__slots__)
+
+    def keep(self, pairs):
+        names = self.names
+        return {name: value for name, value in pairs if name in names}
+
+    def build(self, data):
+        """
+        Builds a forecast record from a decoded Dark Sky style response.
+        """
+        forecast = self.forecast_type(data.get('currently', {}))
+        for name, point_type in self.point_types.items():
+            if name in data:
+                setattr(forecast, name, Block(data[name], point_type))
+        return forecast
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Shares one fetch of each data source between every screen using it. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import syslog
+import time
+
+# local imports
+from fetcher import BackgroundFetcher
+
+
+class DataScheduler:
+    """
+    Owns one BackgroundFetcher per data source. Screens subscribe to the
+    sources they draw from and say how old that data may get. Each source is
+    then fetched once for all of its subscribers, as often as the most
+    demanding one needs but never more often than the source allows, so the
+    number of upstream requests does not depend on how many screens are
+    enabled.
+    """
+    def __init__(self):
+        self.fetchers = {}
+        self.min_intervals = {}
+        self.subscribers = {}
+        self.started = False
+        # Called with the source name, from the fetcher's thread, whenever
+        # a source has new data.
+        self.on_update = None
+
+    def add_source(self, name, fetch, min_interval, timeout, max_backoff):
+        fetcher = BackgroundFetcher(name, fetch, min_interval, timeout,
+                                    max_backoff, self.notify)
+        self.fetchers[name] = fetcher
+        self.min_intervals[name] = min_interval
+        self.subscribers[name] = {}
+        return fetcher
+
+    def subscribe(self, screen, source, max_age):
+        self.subscribers[source][screen] = max_age
+        self.fetchers[source].interval = max(
+            self.min_intervals[source],
+            min(self.subscribers[source].values()))
+        # Screens loaded on first use subscribe after start()
+        if self.started:
+            self.fetchers[source].ensure_started()
+
+    def unsubscribe(self, screen):
+        for subscribers in self.subscribers.values():
+            subscribers.pop(screen, None)
+
+    # Start fetching every source that at least one screen subscribed to.
+    def start(self):
+        self.started = True
+        for name, fetcher in self.fetchers.items():
+            if self.subscribers[name]:
+                syslog.syslog('Fetching %s every %d seconds for %s' % (
+                    name, fetcher.interval,
+                    ', '.join(self.subscribers[name])))
+                fetcher.ensure_started()
+
+    # Wait until every started source has data or has failed once.
+    def wait_for_first_attempts(self, timeout):
+        deadline = time.time() + timeout
+        for fetcher in self.fetchers.values():
+            if fetcher.is_alive():
+                fetcher.wait_for_first_attempt(
+                    max(0, deadline - time.time()))
+
+    def notify(self, source):
+        if self.on_update is not None:
+            self.on_update(source)
+
+    def snapshot(self, source):
+        return self.fetchers[source].snapshot
+
+
+# The scheduler shared by all screens.
+SCHEDULER = DataScheduler()
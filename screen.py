@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Draws the screens on the framebuffer, or offscreen when headless. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import fcntl
+import os
+import platform
+import struct
+import syslog
+import threading
+import time
+
+# third party imports
+import pygame
+
+# local imports
+import config
+from cache import FontCache, TextCache
+from instrument import INSTRUMENTS, timed
+
+TEXT_CACHE_BYTES = 8 * 1048576  # Memory for rendered labels and values
+FBIOGET_VSCREENINFO = 0x4600  # ioctl for a framebuffer's mode, linux/fb.h
+
+
+class Framebuffer:
+    """
+    A Linux framebuffer device such as /dev/fb1, e.g. a small SPI screen
+    next to the HDMI one that SDL draws on. Frames are converted to the
+    device's 16 bit (RGB565) or 32 bit (XRGB) pixels, which pygame lays out
+    the same way on a little endian Pi, and written over the visible part
+    of the screen.
+    """
+    def __init__(self, device):
+        self.device = device
+        self.fd = os.open(device, os.O_WRONLY)
+        # The visible mode, which can be smaller than the virtual screen
+        # that holds it, e.g. with double buffering
+        info = fcntl.ioctl(self.fd, FBIOGET_VSCREENINFO, bytes(160))
+        (width, height, _, _, xoffset, yoffset,
+         depth) = struct.unpack_from('7I', info)
+        with open(os.path.join('/sys/class/graphics',
+                               os.path.basename(device), 'stride')) as f:
+            self.stride = int(f.read())
+        if depth not in (16, 32):
+            os.close(self.fd)
+            raise ValueError('%s has %d bits per pixel, only 16 and 32 are '
+                             'supported' % (device, depth))
+        self.size = (width, height)
+        self.offset = yoffset * self.stride + xoffset * depth // 8
+        self.pixels = pygame.Surface(self.size, 0, depth)
+        print("Framebuffer %s Size: %d x %d" % ((device,) + self.size))
+
+    def show(self, frame):
+        self.pixels.blit(frame, (0, 0))
+        data = self.pixels.get_buffer().raw
+        pitch = self.pixels.get_pitch()
+        if pitch == self.stride:
+            os.pwrite(self.fd, data, self.offset)
+            return
+        # Rows are padded differently in memory and on the device
+        row = self.size[0] * self.pixels.get_bytesize()
+        for y in range(self.size[1]):
+            os.pwrite(self.fd, data[y * pitch:y * pitch + row],
+                      self.offset + y * self.stride)
+
+
+###############################################################################
+class MyDisplay:
+    screen = None
+
+    ####################################################################
+    def __init__(self, size=None, frame_dir=None, frame_format='png',
+                 framebuffer=None, rotation=0, location=None, shares=None):
+        """
+        Ininitializes a new pygame screen using the framebuffer. If size
+        (w, h tuple) is given, no display is opened and everything is drawn
+        to an offscreen surface of that size instead. Headless frames are
+        written to frame_dir, if given, as 'png' images or 'raw' RGB
+        buffers, and to the Linux framebuffer device `framebuffer`, if
+        given, whose size is used when size is not. Headless frames are
+        turned counterclockwise by `rotation` degrees (0, 90, 180 or 270),
+        for screens mounted upside down (180), or portrait screens turned on
+        their side (90 or 270) to be seen in landscape; size is the size of
+        the frames. Screens are only laid out in landscape.
+
+        location (lat, lon) is where the forecast shown comes from,
+        config.LAT/LON by default. Displays drawn by the same process pass
+        the first one as `shares`, to use its font and text caches and be
+        paused along with it.
+        """
+        if rotation not in (0, 90, 180, 270):
+            raise ValueError('rotation must be 0, 90, 180 or 270, not %r'
+                             % rotation)
+        if framebuffer:
+            framebuffer = Framebuffer(framebuffer)
+            size = size or framebuffer.size
+        if rotation and size is None:
+            raise ValueError('Only headless screens can be rotated')
+        self.headless = size is not None
+        self.frame_dir = frame_dir
+        self.frame_format = frame_format
+        self.frame_count = 0
+        self.framebuffer = framebuffer
+        self.rotation = rotation
+        self.location = location or (config.LAT, config.LON)
+        if frame_dir:
+            os.makedirs(frame_dir, exist_ok=True)
+        if self.headless:
+            # SDL's dummy driver needs no display. A tiny window is still
+            # opened so that surfaces can be converted to a pixel format.
+            # Later displays of this process use whatever the first one
+            # opened.
+            if not pygame.display.get_init():
+                os.environ['SDL_VIDEODRIVER'] = 'dummy'
+                pygame.display.init()
+                pygame.display.set_mode((1, 1))
+            if rotation in (90, 270):
+                size = (size[1], size[0])
+            # Every screen is laid out for landscape
+            if size[0] < size[1]:
+                raise ValueError(
+                    'Headless screens are drawn in landscape, not %d x %d; '
+                    'rotation 90 and 270 are for screens that are taller '
+                    'than wide until turned on their side' % size)
+            print("Headless Size: %d x %d" % (size[0], size[1]))
+        elif platform.system() == 'Darwin':
+            pygame.display.init()
+            driver = pygame.display.get_driver()
+            print('Using the {0} driver.'.format(driver))
+        else:
+            # Based on "Python GUI in Linux frame buffer"
+            # http://www.karoltomala.com/blog/?p=679
+            # archived at https://web.archive.org/
+            disp_no = os.getenv("DISPLAY")
+            if disp_no:
+                print("X Display = {0}".format(disp_no))
+                syslog.syslog("X Display = {0}".format(disp_no))
+
+            # Check which frame buffer drivers are available
+            # Start with fbcon since directfb hangs with composite output
+            drivers = ['x11', 'fbcon', 'directfb', 'svgalib']
+            found = False
+            for driver in drivers:
+                # Make sure that SDL_VIDEODRIVER is set
+                if not os.getenv('SDL_VIDEODRIVER'):
+                    os.putenv('SDL_VIDEODRIVER', driver)
+                try:
+                    pygame.display.init()
+                except pygame.error:
+                    print('Driver: {0} failed.'.format(driver))
+                    syslog.syslog('Driver: {0} failed.'.format(driver))
+                    continue
+                found = True
+                break
+
+            if not found:
+                raise Exception('No suitable video driver found!')
+
+        if self.headless:
+            self.screen = pygame.Surface(size).convert()
+        else:
+            size = (pygame.display.Info().current_w,
+                    pygame.display.Info().current_h)
+            print("Framebuffer Size: %d x %d" % (size[0], size[1]))
+            syslog.syslog("Framebuffer Size: %d x %d" % (size[0], size[1]))
+            self.screen = pygame.display.set_mode(size, pygame.FULLSCREEN)
+        # Clear the screen to start
+        self.screen.fill((0, 0, 0))
+        # Initialise font support
+        pygame.font.init()
+        if shares is None:
+            self.fonts = FontCache()
+            self.text = TextCache(self.fonts, TEXT_CACHE_BYTES)
+            # Set from other threads while nothing should be drawn, e.g.
+            # during a speedtest with PAUSE_RENDERING
+            self.paused = threading.Event()
+        else:
+            self.fonts = shares.fonts
+            self.text = shares.text
+            self.paused = shares.paused
+        # Render the screen
+        pygame.mouse.set_visible(0)
+        if not self.headless:
+            pygame.display.update()
+
+        # Headless screens are always laid out for their full size
+        if config.FULLSCREEN or self.headless:
+            self.xmax = size[0] - 35
+            self.ymax = size[1] - 5
+            if self.xmax <= 1024:
+                self.icon_size = '64'
+            else:
+                self.icon_size = '256'
+        else:
+            self.xmax = 480 - 35
+            self.ymax = 320 - 5
+            self.icon_size = '64'
+        self.subwindow_text_height = 0.055
+        self.time_date_text_height = 0.115
+        self.time_date_small_text_height = 0.075
+        self.time_date_y_position = 8
+        self.time_date_small_y_position = 18
+        self.start_time = round(time.time())
+        # Static content of the current screen, see compose()
+        self.background = pygame.Surface(size).convert()
+        self.background_key = None
+        self.dynamic_key = None
+        self.dynamic_rects = []
+        # Where the timing overlay was last drawn, see draw_overlay()
+        self.overlay_rect = None
+
+    def disp_time_date(self, font_name, text_color):
+        # Time & Date
+        time_date_font = self.fonts.get(
+            font_name, int(self.ymax * self.time_date_text_height))
+        # Small Font for Seconds
+        small_font = self.fonts.get(
+            font_name,
+            int(self.ymax * self.time_date_small_text_height))
+
+        time_string = time.strftime("%a, %b %d   %I:%M", time.localtime())
+        am_pm_string = time.strftime(" %p", time.localtime())
+
+        rendered_time_string = time_date_font.render(time_string, True,
+                                                     text_color)
+        (rendered_time_x, rendered_time_y) = rendered_time_string.get_size()
+        rendered_am_pm_string = small_font.render(am_pm_string, True,
+                                                  text_color)
+        (rendered_am_pm_x, rendered_am_pm_y) = rendered_am_pm_string.get_size()
+
+        full_time_string_x_position = self.xmax / 2 - (rendered_time_x +
+                                                       rendered_am_pm_x) / 2
+        time_rect = self.screen.blit(rendered_time_string,
+                                     (full_time_string_x_position,
+                                      self.time_date_y_position))
+        am_pm_rect = self.screen.blit(
+            rendered_am_pm_string,
+            (full_time_string_x_position + rendered_time_x + 3,
+             self.time_date_small_y_position))
+        return [time_rect, am_pm_rect]
+
+    def clock_key(self):
+        return time.strftime("%a, %b %d %I:%M %p", time.localtime())
+
+    @timed('draw clock')
+    def draw_clock(self):
+        return self.disp_time_date("freesans", (255, 255, 255))
+
+    # Retained mode drawing. Everything that only changes with new data or a
+    # new mode (borders, forecast panels) is drawn by draw_static into a
+    # cached background surface, and that only happens again when static_key
+    # changes. On every other tick just the regions returned by draw_dynamic
+    # (usually the clock) are redrawn, and only if dynamic_key has changed.
+    # Only the regions that changed are passed to pygame.display.update().
+    ####################################################################
+    @timed('compose')
+    def compose(self, static_key, draw_static, dynamic_key=None,
+                draw_dynamic=None):
+        dirty = []
+        if static_key != self.background_key:
+            display = self.screen
+            self.screen = self.background
+            try:
+                self.screen.fill((0, 0, 0))
+                draw_static()
+            finally:
+                self.screen = display
+            self.screen.blit(self.background, (0, 0))
+            self.background_key = static_key
+            self.dynamic_key = None
+            self.dynamic_rects = []
+            dirty.append(self.screen.get_rect())
+
+        if draw_dynamic is not None and dynamic_key != self.dynamic_key:
+            # Restore what was under the previous dynamic content
+            for rect in self.dynamic_rects:
+                self.screen.blit(self.background, rect, rect)
+            rects = draw_dynamic()
+            dirty.extend(self.dynamic_rects)
+            dirty.extend(rects)
+            self.dynamic_rects = rects
+            self.dynamic_key = dynamic_key
+
+        if dirty:
+            self.present(dirty)
+
+    # Show the regions that changed. Headless screens have nothing to show
+    # and write the whole frame to their framebuffer or frame_dir instead,
+    # if they have one.
+    def present(self, dirty):
+        if not self.headless:
+            with INSTRUMENTS.span('display update'):
+                pygame.display.update(dirty)
+            return
+        if not self.frame_dir and self.framebuffer is None:
+            return
+        frame = self.screen
+        if self.rotation:
+            frame = pygame.transform.rotate(frame, self.rotation)
+        if self.framebuffer is not None:
+            with INSTRUMENTS.span('framebuffer update'):
+                self.framebuffer.show(frame)
+        if self.frame_dir:
+            self.frame_count += 1
+            name = 'frame_%06d.%s' % (self.frame_count, self.frame_format)
+            self.save_frame(os.path.join(self.frame_dir, name), frame)
+
+    # Save a frame as a png image, or for 'raw' as the bare RGB bytes, row
+    # by row from the top left.
+    def save_frame(self, filename, frame):
+        if self.frame_format == 'raw':
+            with open(filename, 'wb') as f:
+                f.write(pygame.image.tostring(frame, 'RGB'))
+        else:
+            pygame.image.save(frame, filename)
+
+    # Shown at startup and until the current screen has its first data.
+    def draw_splash(self):
+        self.compose(('splash',), self.draw_splash_message,
+                     self.clock_key(), self.draw_clock)
+
+    def draw_splash_message(self):
+        message = self.text.render(
+            'Loading...', 'freesans',
+            int(self.ymax * self.time_date_small_text_height),
+            (255, 255, 255))
+        self.screen.blit(message, message.get_rect(
+            center=(self.xmax / 2, self.ymax / 2)))
+
+    # Draws the given lines in a box at the bottom left, on top of the
+    # current screen. Whatever the previous call covered is restored first.
+    def draw_overlay(self, lines):
+        font = self.fonts.get('freemono', int(self.ymax * 0.035), bold=False)
+        rendered = [font.render(line, True, (255, 255, 0)) for line in lines]
+        width = max([r.get_width() for r in rendered] + [0]) + 10
+        height = sum(r.get_height() for r in rendered) + 10
+        rect = pygame.Rect(0, 0, width, height)
+        rect.bottomleft = self.screen.get_rect().bottomleft
+        dirty = [rect]
+        if self.overlay_rect is not None:
+            self.screen.blit(self.background, self.overlay_rect,
+                             self.overlay_rect)
+            dirty.append(self.overlay_rect)
+        self.screen.fill((0, 0, 0), rect)
+        y = rect.top + 5
+        for line in rendered:
+            self.screen.blit(line, (rect.left + 5, y))
+            y += line.get_height()
+        self.overlay_rect = rect
+        self.present(dirty)
+
+    # Forget the cached background so the next compose() redraws everything.
+    def invalidate(self):
+        self.background_key = None
+        self.overlay_rect = None
+
+    # Save a jpg image of the screen.
+    ####################################################################
+    def screen_cap(self):
+        # Create target Directory if don't exist
+        save_dir = '/home/pi/Pictures/PiWeatherRock/'
+        if not os.path.exists(save_dir):
+            os.mkdir(save_dir)
+        timestamp = time.strftime("%Y-%m-%dT%H.%M.%S", time.localtime())
+        pygame.image.save(self.screen, f"{save_dir}{timestamp}.jpeg")
+        print("Screen capture complete.")
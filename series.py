@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Columnar hourly and daily forecast series, and stats derived from them. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+from array import array
+import datetime
+import math
+
+# Fields kept from each Dark Sky data block. Missing values are NaN.
+HOURLY_FIELDS = ('time', 'precipProbability', 'precipIntensity',
+                 'temperature', 'apparentTemperature', 'windSpeed',
+                 'windGust', 'humidity')
+DAILY_FIELDS = ('time', 'sunriseTime', 'sunsetTime', 'precipProbability',
+                'precipIntensity', 'temperatureHigh', 'temperatureLow',
+                'windGust')
+
+
+class Series:
+    """
+    One Dark Sky data block (hourly or daily) stored by column: an array of
+    doubles per field, in the order of the data points, so that rules over
+    the whole series are simple loops over flat arrays.
+    """
+    __slots__ = ('columns',)
+
+    def __init__(self, block, fields):
+        points = list(block)
+        self.columns = {}
+        for field in fields:
+            self.columns[field] = array(
+                'd', [getattr(point, field, math.nan) for point in points])
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def __len__(self):
+        return len(self.columns['time'])
+
+
+class ForecastStats:
+    """
+    What the hourly series says about rain and wind. Times are Unix
+    timestamps; peak_precip_* and max_gust are None when there is no such
+    data.
+    """
+    __slots__ = ('take_umbrella', 'rain_hours_in_daylight',
+                 'peak_precip_start', 'peak_precip_end',
+                 'peak_precip_intensity', 'max_gust')
+
+    def __init__(self, take_umbrella, rain_hours_in_daylight,
+                 peak_precip_start, peak_precip_end, peak_precip_intensity,
+                 max_gust):
+        self.take_umbrella = take_umbrella
+        self.rain_hours_in_daylight = rain_hours_in_daylight
+        self.peak_precip_start = peak_precip_start
+        self.peak_precip_end = peak_precip_end
+        self.peak_precip_intensity = peak_precip_intensity
+        self.max_gust = max_gust
+
+
+def today_bounds():
+    """
+    Returns the local start of today and of tomorrow as Unix timestamps.
+    """
+    today = datetime.date.today()
+    start = datetime.datetime.combine(today, datetime.time())
+    end = start + datetime.timedelta(days=1)
+    return start.timestamp(), end.timestamp()
+
+
+def peak_window(times, intensity, hours):
+    """
+    Finds the run of `hours` consecutive hours with the most precipitation.
+    Returns (start, end, mean intensity), or None if no rain is expected.
+    """
+    if len(intensity) < hours or hours < 1:
+        return None
+    total = sum(intensity[:hours])
+    best, best_start = total, 0
+    for start in range(1, len(intensity) - hours + 1):
+        total += intensity[start + hours - 1] - intensity[start - 1]
+        if total > best:
+            best, best_start = total, start
+    if best <= 0:
+        return None
+    return (times[best_start], times[best_start + hours - 1] + 3600,
+            best / hours)
+
+
+def forecast_stats(icon_now, icon_today, hourly, daily, threshold,
+                   window_hours):
+    """
+    Works out the umbrella advice and rain and wind stats. An umbrella is
+    needed if it rains now or today, or if any daylight hour left today has
+    a precipitation probability of at least `threshold`.
+    """
+    times = hourly['time']
+    day_start, day_end = today_bounds()
+    # Only daylight hours of today count towards the umbrella
+    first = max(day_start, daily['sunriseTime'][0])
+    last = daily['sunsetTime'][0]
+    rain_hours = sum(1 for t, chance in zip(times,
+                                            hourly['precipProbability'])
+                     if first <= t <= last and t < day_end and
+                     chance >= threshold)
+    take_umbrella = (icon_now == 'rain' or icon_today == 'rain' or
+                     rain_hours > 0)
+
+    intensity = array('d', [0.0 if math.isnan(value) else value
+                            for value in hourly['precipIntensity']])
+    peak = peak_window(times, intensity, window_hours) or (None, None, None)
+
+    # Strongest gust over the next 24 hours
+    gusts = [gust for t, gust in zip(times, hourly['windGust'])
+             if t < times[0] + 86400 and not math.isnan(gust)]
+    max_gust = max(gusts) if gusts else None
+
+    return ForecastStats(take_umbrella, rain_hours, peak[0], peak[1], peak[2],
+                         max_gust)
@@ -92,11 +92,9 @@ vcsrepo { '/home/pi/PiWeatherRock':
 }
 
 $python_packages = [
-  'darkskylib',
   'pygame',
   'pyserial',
   'requests',
-  'pynanosvg',
 ]
 
 python::pip { $python_packages:
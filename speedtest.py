@@ -42,21 +42,209 @@ import datetime
 import os
 import syslog
 import time
-import subprocess
-import math
 import json
-import glob
 import shutil
+import sqlite3
 
 # third party imports
 import pygame
 
 # local imports
+from dial import DIALS, zone_color
+from history import SpeedtestHistory, history_file
+from instrument import timed
+from scheduler import SCHEDULER
+from speedtest_runner import SpeedtestRunner
+from weather import ICONS
 from weather_rock_methods import *
 import plugin_configs.speedtest_config as speedtest_config
 
+# global variable
+SPEEDTEST_ICON_DIR = '/home/pi/PiWeatherRock/icons/speedtest/'
+# New results are read from 'queue' in here, old ones moved to 'archive'
+SPEEDTEST_DIR = '/home/pi/PiWeatherRock/speedtest/'
+# One SpeedtestStore per directory, shared by the speedtest screens of every
+# display, so a queue is only scanned and pruned once
+STORES = {}
+
+
+class SpeedtestStore:
+    """
+    An in-memory index of the results in the speedtest queue directory. The
+    directory is only listed again when its mtime changes, only new files
+    are stat'ed, and a result is only read and parsed once, when it becomes
+    the newest one. This keeps the display off the disk (or the network, for
+    a mounted queue) between results.
+
+    Results are ordered by ctime. Empty files are being written by
+    scripts/speedtest.sh; writing to a file does not change the directory's
+    mtime, so they are stat'ed again until they have content.
+    """
+    def __init__(self, directory):
+        self.queue = os.path.join(directory, 'queue')
+        self.archive = os.path.join(directory, 'archive')
+        # (ctime, size) of every result file in the queue, by name
+        self.files = {}
+        self.queue_mtime = None
+        # The newest result that could be read, and the file it came from
+        self.latest_file = None
+        self.latest = None
+        self.failed_file = None
+
+    # Picks up new results. Returns True if the newest result changed.
+    def refresh(self):
+        mtime = os.stat(self.queue).st_mtime_ns
+        if mtime != self.queue_mtime:
+            self.scan()
+            # A change in the same mtime tick as this scan would go unnoticed,
+            # so a directory changed in the last few seconds is listed again.
+            if time.time() - mtime / 1e9 > 2:
+                self.queue_mtime = mtime
+            else:
+                self.queue_mtime = None
+        else:
+            for name, (ctime, size) in list(self.files.items()):
+                if size == 0:
+                    self.stat(name)
+        return self.load_latest()
+
+    def scan(self):
+        names = set(name for name in os.listdir(self.queue)
+                    if name.endswith('.json'))
+        for name in list(self.files):
+            if name not in names:
+                del self.files[name]
+        for name in names:
+            if name not in self.files or self.files[name][1] == 0:
+                self.stat(name)
+
+    def stat(self, name):
+        try:
+            st = os.stat(os.path.join(self.queue, name))
+        except FileNotFoundError:
+            self.files.pop(name, None)
+            return
+        self.files[name] = (st.st_ctime, st.st_size)
+
+    # Result file names, oldest first.
+    def ordered(self):
+        return sorted(self.files, key=lambda name: (self.files[name][0], name))
+
+    # Paths of the result files that have content, oldest first.
+    def results(self):
+        return [os.path.join(self.queue, name) for name in self.ordered()
+                if self.files[name][1] > 0]
+
+    def load_latest(self):
+        results = self.results()
+        if not results:
+            return False
+        results_file = results[-1]
+        if results_file == self.latest_file:
+            return False
+        try:
+            with open(results_file, 'rb') as f:
+                self.latest = json.load(f)
+        except (OSError, ValueError) as e:
+            # Possibly still being written, tried again on the next refresh
+            if results_file != self.failed_file:
+                syslog.syslog('Unable to read %s: %s' % (results_file, e))
+                self.failed_file = results_file
+            return False
+        self.latest_file = results_file
+        return True
+
+    # Moves all but the newest `keep` results to the archive directory, or
+    # removes them.
+    def prune(self, keep, archive):
+        for name in self.ordered()[:-keep]:
+            src_fname = os.path.join(self.queue, name)
+            try:
+                if archive:
+                    shutil.move(src_fname, os.path.join(self.archive, name))
+                else:
+                    os.remove(src_fname)
+            except OSError as e:
+                syslog.syslog('Unable to clean up %s: %s' % (src_fname, e))
+            del self.files[name]
+
+
+# Speedtests run on the Pi are measured in a child process on the SPEEDTEST
+# fetcher's thread, and their results come back over a pipe. Without these
+# settings it runs what scripts/speedtest.sh runs, as before.
+RUNNER = SpeedtestRunner(
+    getattr(speedtest_config, 'SPEEDTEST_COMMAND',
+            ['/home/pi/.local/bin/speedtest-cli', '--json']),
+    getattr(speedtest_config, 'SPEEDTEST_NICE', 0),
+    getattr(speedtest_config, 'SPEEDTEST_CPUS', None))
+
+
+def run_speedtest(timeout):
+    """
+    Runs on the speedtest fetcher's thread. Each result is recorded in the
+    history right away, whichever screen is shown at the time.
+    """
+    result = RUNNER.run(timeout)
+    if history_file():
+        history = SpeedtestHistory(history_file())
+        history.add_all([result])
+        history.close()
+    return result
+
+
+def load_last_speedtest():
+    """
+    Seeds SPEEDTEST with the newest result in the history, so it can be
+    shown right away and a restart does not run a test before UPDATE_FREQ
+    is up.
+    """
+    path = history_file()
+    if not path or not os.path.exists(path):
+        return
+    try:
+        history = SpeedtestHistory(path)
+        result = history.latest_result()
+        tested_at = history.latest()[0]
+        history.close()
+    except sqlite3.Error as e:
+        syslog.syslog('Unable to read speedtest history: %s' % e)
+        return
+    if result is not None:
+        SPEEDTEST.seed(result, tested_at)
+
+
+if speedtest_config.SPEEDTEST_ON_PI:
+    SPEEDTEST = SCHEDULER.add_source('speedtest', run_speedtest,
+                                     speedtest_config.UPDATE_FREQ,
+                                     getattr(speedtest_config,
+                                             'SPEEDTEST_TIMEOUT', 120),
+                                     speedtest_config.UPDATE_FREQ)
+    load_last_speedtest()
+
+
+class Speedtest(Plugin):
+    # Tests run on the Pi come from SPEEDTEST, others from files in the queue
+    if speedtest_config.SPEEDTEST_ON_PI:
+        DATA_SOURCES = {'speedtest': speedtest_config.UPDATE_FREQ}
+    # New results show up as files, so look for them every few seconds
+    POLL_INTERVAL = 5
+
+    def __init__(self, name, display, plugin_config):
+        super().__init__(name, display, plugin_config)
+        if SPEEDTEST_DIR not in STORES:
+            STORES[SPEEDTEST_DIR] = SpeedtestStore(SPEEDTEST_DIR)
+        self.store = STORES[SPEEDTEST_DIR]
+        self.history = None
+        if history_file() and not speedtest_config.SPEEDTEST_ON_PI:
+            self.history = SpeedtestHistory(history_file())
+        if getattr(speedtest_config, 'PAUSE_RENDERING', False):
+            RUNNER.pause = display.paused
+        # The result shown, and what identifies it
+        self.latest = None
+        self.latest_key = None
+        # The last error reading the queue, while it keeps failing
+        self.queue_error = None
 
-class Speedtest:
     def get_speedtest(self, last_update_time):
 
         # Determine if this is the first time fetching new speedtest results.
@@ -66,75 +254,66 @@ class Speedtest:
 
         if initial:
             # Make sure the speedtest directories exist.
-            os.makedirs(
-                os.path.join("/home/pi/PiWeatherRock/", "speedtest", "queue"),
-                exist_ok=True)
-            os.makedirs(
-                os.path.join(
-                    "/home/pi/PiWeatherRock/", "speedtest", "archive"),
-                exist_ok=True)
-
-        # Run speedtest on Pi and store the results in json format.
+            try:
+                os.makedirs(self.store.queue, exist_ok=True)
+                os.makedirs(self.store.archive, exist_ok=True)
+            except OSError as e:
+                syslog.syslog('Unable to create speedtest directories: %s'
+                              % e)
+
         if speedtest_config.SPEEDTEST_ON_PI:
-            if ((time.time() -
-                 last_update_time) > speedtest_config.UPDATE_FREQ):
-                last_update_time = round(time.time())
-                syslog.syslog('Running speedtest on Pi.')
-                subprocess.Popen(["/bin/bash",
-                                  "/home/pi/PiWeatherRock/scripts/speedtest.sh"])
-                if initial:
-                    return last_update_time
+            snapshot = SPEEDTEST.snapshot
+            if snapshot.data is None:
+                return False
+            self.latest = snapshot.data
+            self.latest_key = snapshot.fetched_at
+            return snapshot.fetched_at
+
+        # Always keep the 3 most recent results in the queue, and move or
+        # remove older ones whenever a new one shows up
+        try:
+            if self.store.refresh():
+                if self.history is not None:
+                    self.history.ingest(self.store.results())
+                self.store.prune(3, speedtest_config.KEEP_ALL_SPEEDTESTS)
+        except OSError as e:
+            # E.g. a mounted queue that went away. The last results stay on
+            # screen and the queue is read again on the next poll; the error
+            # is only logged when it changes.
+            if str(e) != self.queue_error:
+                print('Error reading speedtest results: %s' % e)
+                syslog.syslog('Error reading speedtest results: %s' % e)
+                self.queue_error = str(e)
         else:
-            if initial:
-                # Make sure speedtest results from mounted location exist
-                list_of_files = glob.glob(
-                    '/home/pi/PiWeatherRock/speedtest/queue/*.json')
-                list_of_files.sort(key=os.path.getctime)
-                if (os.stat(list_of_files[-1:][0]).st_size > 0 or
-                        os.stat(list_of_files[-2:][0]).st_size > 0):
-                    return round(time.time())
-                else:
-                    syslog.syslog('No speedtest results found.')
-                    return False
-
-        # Move or remove old test results
-        src = '/home/pi/PiWeatherRock/speedtest/queue/'
-        dst = '/home/pi/PiWeatherRock/speedtest/archive/'
-        file_list = glob.glob(src + "*.json")
-        file_list.sort(key=os.path.getctime)
-        keep = file_list[-3:]  # always keep 3 most recent results in queue
-        for fname in os.listdir(src):
-            if os.path.join(src, fname) not in keep:
-                if speedtest_config.KEEP_ALL_SPEEDTESTS:
-                    src_fname = os.path.join(src, fname)
-                    dst_fname = os.path.join(dst, fname)
-                    shutil.move(src_fname, dst_fname)
-                else:
-                    if os.path.exists(src_fname):
-                        os.remove(src_fname)
+            self.queue_error = None
 
+        if self.store.latest is None:
+            # Make sure speedtest results from mounted location exist
+            syslog.syslog('No speedtest results found.')
+            return False
+        self.latest = self.store.latest
+        self.latest_key = self.store.latest_file
+
+        if initial:
+            last_update_time = round(time.time())
         return last_update_time
 
     def disp_speedtest(self, last_update_time):
-        # Fill the screen with black
-        self.screen.fill((0, 0, 0))
+        # Only redraw the dials when a new result shows up.
+        info = self.latest
+        self.compose(('speedtest', self.latest_key),
+                     lambda: self.draw_speedtest(info),
+                     self.clock_key(), self.draw_clock)
+
+    # Everything on this screen except the clock.
+    @timed('draw speedtest')
+    def draw_speedtest(self, info):
         xmin = 10
         lines = 5
         line_color = (255, 255, 255)
         text_color = (255, 255, 255)
         font_name = "freesans"
 
-        # Get stored speedtest results
-        list_of_files = glob.glob(
-            '/home/pi/PiWeatherRock/speedtest/queue/*.json')
-        list_of_files.sort(key=os.path.getctime)
-        if (os.stat(list_of_files[-1:][0]).st_size > 0):
-            with open(list_of_files[-1:][0], 'rb') as f:
-                info = json.load(f)
-        else:
-            with open(list_of_files[-2:][0], 'rb') as f:
-                info = json.load(f)
-
         ping = info['ping']
         dl = info['download'] / 1000000
         ul = info['upload'] / 1000000
@@ -163,12 +342,9 @@ class Speedtest:
                          (self.xmax * 0.5, self.ymax * 0.15),
                          (self.xmax * 0.5, self.ymax * 0.85), lines)
 
-        # Draw date and time at top of screen
-        self.disp_time_date(font_name, text_color)
-
         # Draw ping at the bottom of the screen
-        ping_font = pygame.font.SysFont(
-            font_name, int(self.ymax * 0.075), bold=1)
+        ping_font = self.fonts.get(
+            font_name, int(self.ymax * 0.075))
         text = ping_font.render('Ping: ' + "{0:.1f}".format(ping) + ' ms',
                                 True, text_color)
         (text_x, text_y) = text.get_size()
@@ -182,8 +358,8 @@ class Speedtest:
         time_txt = ping_font.render('Tested at ' + datetime.datetime.strftime(
             dt_obj, "%I:%M "), True, text_color)
         (time_txt_x, time_txt_y) = time_txt.get_size()
-        ampm_font = pygame.font.SysFont(
-            font_name, int(self.ymax * 0.05), bold=1)
+        ampm_font = self.fonts.get(
+            font_name, int(self.ymax * 0.05))
         ampm_text = ampm_font.render(
             datetime.datetime.strftime(dt_obj, "%p"), True, text_color)
         (ampm_text_x, ampm_text_y) = ampm_text.get_size()
@@ -194,55 +370,29 @@ class Speedtest:
             ((self.xmax * 0.75) + (time_txt_x / 2) - 2 * (ampm_text_x / 3),
              self.ymax * 0.895))
 
-        # Determine which download dial image to show
-        st_dir = '/home/pi/PiWeatherRock/icons/speedtest/'
+        # Draw the download and upload dials
         dl_percent_float = (dl / speedtest_config.PROMISED_DL_SPEED) * 100
-        dl_percent = math.floor(dl_percent_float / 5) * 5
-        if speedtest_config.RED_CUTOFF >= dl_percent:
-            if dl_percent == 0:
-                dl_img = f"{st_dir}red/5.svg"
-            else:
-                dl_img = f"{st_dir}red/{dl_percent}.svg"
-        elif speedtest_config.YELLOW_CUTOFF >= dl_percent:
-            dl_img = f"{st_dir}yellow/{dl_percent}.svg"
-        elif dl_percent >= 125:
-            dl_img = f"{st_dir}green/125.svg"
-        else:
-            dl_img = f"{st_dir}green/{dl_percent}.svg"
-
-        # Determine which upload dial image to show
         ul_percent_float = (ul / speedtest_config.PROMISED_UL_SPEED) * 100
-        ul_percent = math.floor(ul_percent_float / 5) * 5
-        if speedtest_config.RED_CUTOFF >= ul_percent:
-            ul_img = f"{st_dir}red/{ul_percent}.svg"
-            if ul_percent == 0:
-                ul_img = f"{st_dir}red/5.svg"
-        elif speedtest_config.YELLOW_CUTOFF >= ul_percent:
-            ul_img = f"{st_dir}yellow/{ul_percent}.svg"
-        elif ul_percent >= 125:
-            ul_img = f"{st_dir}green/125.svg"
-        else:
-            ul_img = f"{st_dir}green/{ul_percent}.svg"
-
-        # Display download and upload dial images
-        dl_dial_svg = load_svg(dl_img, fit_to=(
-            (self.ymax * 0.6, self.ymax * 0.6)))
-        ul_dial_svg = load_svg(ul_img, fit_to=(
-            (self.ymax * 0.6, self.ymax * 0.6)))
         dial_size = self.ymax * 0.6
+        dl_dial = DIALS.render(dl_percent_float, dial_size, zone_color(
+            dl_percent_float, speedtest_config.RED_CUTOFF,
+            speedtest_config.YELLOW_CUTOFF))
+        ul_dial = DIALS.render(ul_percent_float, dial_size, zone_color(
+            ul_percent_float, speedtest_config.RED_CUTOFF,
+            speedtest_config.YELLOW_CUTOFF))
         dial_pad = ((self.xmax / 2) - dial_size) / 2
-        self.screen.blit(dl_dial_svg, (dial_pad, self.ymax * 0.2))
-        self.screen.blit(ul_dial_svg,
+        self.screen.blit(dl_dial, (dial_pad, self.ymax * 0.2))
+        self.screen.blit(ul_dial,
                          ((self.xmax / 2) + dial_pad, self.ymax * 0.2))
 
         # Display download and upload identifier icons
-        dl_icon_svg = load_svg(f"{st_dir}download.svg",
-                               fit_to=((self.ymax * 0.1, self.ymax * 0.1)))
-        ul_icon_svg = load_svg(f"{st_dir}upload.svg",
-                               fit_to=((self.ymax * 0.1, self.ymax * 0.1)))
-        self.screen.blit(dl_icon_svg, ((dial_pad / 2), self.ymax * 0.7))
-        self.screen.blit(ul_icon_svg, ((self.xmax / 2) + (dial_pad / 2),
-                                       self.ymax * 0.7))
+        st_dir = SPEEDTEST_ICON_DIR
+        icon_size = (self.ymax * 0.1, self.ymax * 0.1)
+        dl_icon = ICONS.get(f"{st_dir}download.svg", fit_to=icon_size)
+        ul_icon = ICONS.get(f"{st_dir}upload.svg", fit_to=icon_size)
+        self.screen.blit(dl_icon, ((dial_pad / 2), self.ymax * 0.7))
+        self.screen.blit(ul_icon, ((self.xmax / 2) + (dial_pad / 2),
+                                   self.ymax * 0.7))
 
         # Format the upload and download rate numbers depending on size
         if ul < 10:
@@ -260,17 +410,17 @@ class Speedtest:
             dl_str = str(round(dl))
 
         # Display DL and UL rate in center of dial
-        speed_font = pygame.font.SysFont(
-            'freesans', int(self.ymax * 0.12), bold=1)
-        dl_text = speed_font.render(dl_str, True, (255, 255, 255))
-        ul_text = speed_font.render(ul_str, True, (255, 255, 255))
+        speed_size = int(self.ymax * 0.12)
+        dl_text = self.text.render(dl_str, 'freesans', speed_size,
+                                   (255, 255, 255))
+        ul_text = self.text.render(ul_str, 'freesans', speed_size,
+                                   (255, 255, 255))
         (dl_text_x, dl_text_y) = dl_text.get_size()
         (ul_text_x, ul_text_y) = ul_text.get_size()
         if speedtest_config.SHOW_MBPS:
             # Optionally display Mb/s and change location of DL and UL rate
-            rate_font = pygame.font.SysFont(
-                'freesans', int(self.ymax * 0.08), bold=1)
-            text = rate_font.render('Mb/s', True, (255, 255, 255))
+            text = self.text.render('Mb/s', 'freesans',
+                                    int(self.ymax * 0.08), (255, 255, 255))
             (text_x, text_y) = text.get_size()
             self.screen.blit(text,
                              (dial_pad + (self.ymax * 0.3) - (text_x / 2),
@@ -294,15 +444,16 @@ class Speedtest:
 
         # Display UL and DL percentage
         if speedtest_config.SHOW_SPEEDTEST_PERCENTAGE:
-            percent_font = pygame.font.SysFont(
-                'freesans', int(self.ymax * 0.08), bold=1)
-            symbol_font = pygame.font.SysFont(
-                'freesans', int(self.ymax * 0.05), bold=1)
-            dlp_text = percent_font.render(str(round(dl_percent_float)),
-                                           True, (255, 255, 255))
-            ulp_text = percent_font.render(str(round(ul_percent_float)),
-                                           True, (255, 255, 255))
-            symbol_text = symbol_font.render("%", True, (255, 255, 255))
+            percent_size = int(self.ymax * 0.08)
+            dlp_text = self.text.render(str(round(dl_percent_float)),
+                                        'freesans', percent_size,
+                                        (255, 255, 255))
+            ulp_text = self.text.render(str(round(ul_percent_float)),
+                                        'freesans', percent_size,
+                                        (255, 255, 255))
+            symbol_text = self.text.render("%", 'freesans',
+                                           int(self.ymax * 0.05),
+                                           (255, 255, 255))
             (symbol_text_x, symbol_text_y) = symbol_text.get_size()
             (dlp_text_x, dlp_text_y) = dlp_text.get_size()
             (ulp_text_x, ulp_text_y) = ulp_text.get_size()
@@ -321,5 +472,6 @@ class Speedtest:
                              (self.xmax - 3 * (dial_pad / 4) + (ulp_text_x / 2)
                               - (symbol_text_x / 2), self.ymax * 0.725))
 
-        # Update the display
-        pygame.display.update()
+    # Entry points used by the main loop, see plugins.py
+    fetch = get_speedtest
+    render = disp_speedtest
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Runs speedtests on the Pi in a managed child process. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import json
+import os
+import subprocess
+import syslog
+import threading
+import time
+
+
+class SpeedtestRunner:
+    """
+    Runs a speedtest command that prints its result as JSON, e.g.
+    speedtest-cli --json, and returns the parsed result read from its
+    stdout. Only one test runs at a time. The test gets the given niceness
+    (and with it the matching I/O priority) and is pinned to the given CPUs,
+    if any. While a test runs, `pause`, if set to a threading.Event, is set
+    so that the display can stop drawing.
+    """
+    def __init__(self, command, nice=0, cpus=None):
+        self.command = command
+        self.nice = nice
+        self.cpus = cpus
+        self.pause = None
+        self.lock = threading.Lock()
+
+    def run(self, timeout):
+        if not self.lock.acquire(blocking=False):
+            raise RuntimeError('a speedtest is already running')
+        try:
+            if self.pause is not None:
+                self.pause.set()
+            return self.measure(timeout)
+        finally:
+            if self.pause is not None:
+                self.pause.clear()
+            self.lock.release()
+
+    def measure(self, timeout):
+        syslog.syslog('Running speedtest on Pi.')
+        start = time.time()
+        process = subprocess.Popen(self.command, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        # Set from here rather than in the child, which is not safe to do
+        # between fork and exec with other threads running. The test has not
+        # started measuring yet by the time these apply.
+        try:
+            if self.nice:
+                os.setpriority(os.PRIO_PROCESS, process.pid, self.nice)
+            if self.cpus:
+                os.sched_setaffinity(process.pid, self.cpus)
+        except OSError as e:
+            syslog.syslog('Unable to set speedtest priority: %s' % e)
+        try:
+            out, err = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        if process.returncode != 0:
+            raise RuntimeError('speedtest exited with %d: %s' % (
+                process.returncode, err.decode(errors='replace').strip()))
+        result = json.loads(out)
+        syslog.syslog('Speedtest took %.0f seconds.' % (time.time() - start))
+        return result
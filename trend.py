@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Plugin drawing the trend of speedtest results over the last weeks. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+# standard imports
+import datetime
+import syslog
+import time
+
+# third party imports
+import pygame
+
+# local imports
+from dial import zone_color
+from history import SpeedtestHistory, history_file
+from instrument import timed
+from weather_rock_methods import *
+import plugin_configs.speedtest_config as speedtest_config
+
+# Color of the min to max range of each bucket, and of the promised speed
+RANGE_COLOR = (90, 90, 90)
+PROMISED_COLOR = (160, 160, 160)
+
+
+class Trend(Plugin):
+    # New results show up every UPDATE_FREQ at most; the speedtest screen
+    # records them in the history
+    POLL_INTERVAL = 60
+
+    def __init__(self, name, display, plugin_config):
+        super().__init__(name, display, plugin_config)
+        self.history = None
+        # The time span shown, its buckets and the newest result in them
+        self.window = None
+        self.buckets = []
+        self.newest = None
+
+    def get_trend(self, last_update_time):
+        if not history_file():
+            syslog.syslog('SPEEDTEST_HISTORY is not set, no trend to show.')
+            return False
+        if self.history is None:
+            self.history = SpeedtestHistory(history_file())
+
+        newest, count = self.history.latest()
+        if not count:
+            syslog.syslog('No speedtest history found.')
+            return False
+
+        # Buckets start at local midnight and the chart ends with today. The
+        # first day is found by date, as days around a daylight saving time
+        # change are not 24 hours long.
+        today = datetime.date.today()
+        first_day = today - datetime.timedelta(days=self.config.DAYS - 1)
+        tomorrow = today + datetime.timedelta(days=1)
+        window = (time.mktime(first_day.timetuple()),
+                  time.mktime(tomorrow.timetuple()))
+        if (newest, window) != (self.newest, self.window):
+            self.buckets = self.history.summary(
+                window[0], window[1], self.config.BUCKET_HOURS * 3600)
+            self.newest = newest
+            self.window = window
+        return newest
+
+    def disp_trend(self, last_update_time):
+        self.compose(('trend', self.newest, self.window), self.draw_trend,
+                     self.clock_key(), self.draw_clock)
+
+    # Everything on this screen except the clock.
+    @timed('draw trend')
+    def draw_trend(self):
+        xmin = 10
+        lines = 5
+        line_color = (255, 255, 255)
+        text_color = (255, 255, 255)
+        font_name = "freesans"
+
+        # Draw Screen Border
+        pygame.draw.line(self.screen, line_color,
+                         (xmin, 0), (self.xmax, 0), lines)
+        pygame.draw.line(self.screen, line_color,
+                         (xmin, 0), (xmin, self.ymax), lines)
+        pygame.draw.line(self.screen, line_color,
+                         (xmin, self.ymax), (self.xmax, self.ymax), lines)
+        pygame.draw.line(self.screen, line_color,
+                         (self.xmax, 0), (self.xmax, self.ymax), lines)
+        # Bottom of top box
+        pygame.draw.line(self.screen, line_color, (xmin, self.ymax * 0.15),
+                         (self.xmax, self.ymax * 0.15), lines)
+        # Top of bottom box
+        pygame.draw.line(self.screen, line_color, (xmin, self.ymax * 0.85),
+                         (self.xmax, self.ymax * 0.85), lines)
+
+        self.draw_chart('Download',
+                        [(b.start, b.download_min, b.download_avg,
+                          b.download_max) for b in self.buckets],
+                        speedtest_config.PROMISED_DL_SPEED, 0.15, 0.5)
+        self.draw_chart('Upload',
+                        [(b.start, b.upload_min, b.upload_avg, b.upload_max)
+                         for b in self.buckets],
+                        speedtest_config.PROMISED_UL_SPEED, 0.5, 0.85)
+
+        # Time span and average ping along the bottom
+        text_size = int(self.ymax * 0.06)
+        tests = sum(b.count for b in self.buckets)
+        if tests:
+            ping = sum(b.ping_avg * b.count for b in self.buckets) / tests
+            text = 'Last %d days: %d tests, ping %.1f ms' % (
+                self.config.DAYS, tests, ping)
+        else:
+            text = 'No tests in the last %d days' % self.config.DAYS
+        txt = self.text.render(text, font_name, text_size, text_color)
+        self.screen.blit(txt, txt.get_rect(
+            center=(self.xmax / 2, self.ymax * 0.925)))
+
+    # Draws the min to max range and the average of each bucket between the
+    # given fractions of the screen height, scaled to the fastest result or
+    # the promised speed, whichever is higher. points are (bucket start,
+    # min, avg, max) in Mb/s.
+    def draw_chart(self, label, points, promised, top, bottom):
+        text_color = (255, 255, 255)
+        font_name = "freesans"
+        left = self.xmax * 0.03
+        right = self.xmax * 0.97
+        chart_top = self.ymax * (top + 0.08)
+        chart_bottom = self.ymax * (bottom - 0.02)
+        start, end = self.window
+        bucket = self.config.BUCKET_HOURS * 3600
+        top_speed = max([point[3] for point in points] + [promised]) * 1.05
+
+        def x(timestamp):
+            return left + (timestamp + bucket / 2 - start) / (
+                end - start) * (right - left)
+
+        def y(speed):
+            return chart_bottom - speed / top_speed * (
+                chart_bottom - chart_top)
+
+        label_size = int(self.ymax * 0.045)
+        txt = self.text.render('%s Mb/s, promised %d' % (label, promised),
+                               font_name, label_size, text_color)
+        self.screen.blit(txt, (left + self.xmax * 0.01,
+                               self.ymax * (top + 0.02)))
+
+        pygame.draw.line(self.screen, PROMISED_COLOR, (left, y(promised)),
+                         (right, y(promised)), 1)
+
+        width = max(1, int((right - left) * bucket / (end - start) * 0.6))
+        averages = []
+        for timestamp, low, average, high in points:
+            pygame.draw.line(self.screen, RANGE_COLOR, (x(timestamp), y(low)),
+                             (x(timestamp), y(high)), width)
+            averages.append((x(timestamp), y(average)))
+        if len(averages) > 1:
+            pygame.draw.lines(self.screen, text_color, False, averages, 2)
+
+        # Color each average like the speedtest dials
+        radius = max(2, int(self.ymax * 0.006))
+        for (timestamp, low, average, high), point in zip(points, averages):
+            color = zone_color(average / promised * 100,
+                               speedtest_config.RED_CUTOFF,
+                               speedtest_config.YELLOW_CUTOFF)
+            pygame.draw.circle(self.screen, color, point, radius)
+
+    # Entry points used by the main loop, see plugins.py
+    fetch = get_trend
+    render = disp_trend
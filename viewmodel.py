@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BEGIN LICENSE
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+# END LICENSE
+
+""" Display-ready records built once for each new forecast. """
+
+__version__ = "0.0.13"
+
+###############################################################################
+#   Raspberry Pi Weather Display
+#   Original By: Jim Kemp          10/25/2014
+#   Modified By: Gene Liverman    12/30/2017 & multiple times since
+###############################################################################
+
+
+class Conditions:
+    """
+    Current conditions as they are shown on the daily and hourly screens.
+    """
+    __slots__ = ('temperature', 'feels_like', 'wind', 'humidity', 'summary',
+                 'umbrella')
+
+    def __init__(self, temperature, feels_like, wind, humidity, summary,
+                 umbrella):
+        self.temperature = temperature
+        self.feels_like = feels_like
+        self.wind = wind
+        self.humidity = humidity
+        self.summary = summary
+        self.umbrella = umbrella
+
+
+class Panel:
+    """
+    One of the four forecast boxes at the bottom of the weather screens.
+    """
+    __slots__ = ('label', 'temperature', 'precip', 'icon')
+
+    def __init__(self, label, temperature, precip, icon):
+        self.label = label
+        self.temperature = temperature
+        self.precip = precip
+        self.icon = icon
+
+
+class ForecastView:
+    """
+    Everything the weather screens draw, with all numbers already rounded
+    and formatted, so drawing a screen does no date math or formatting.
+    """
+    __slots__ = ('conditions', 'days', 'hours', 'temperature_letter')
+
+    def __init__(self, conditions, days, hours, temperature_letter):
+        self.conditions = conditions
+        self.days = days
+        self.hours = hours
+        self.temperature_letter = temperature_letter
@@ -37,21 +37,54 @@ __version__ = "0.0.12"
 ###############################################################################
 
 # standard imports
+import collections
+import json
+import os
 import time
 import datetime
 import syslog
 
 # third party imports
-from darksky import forecast
-import requests
 import pygame
 
 # local imports
 import config
+from cache import IconAtlas
+from instrument import timed
+from providers import NOT_MODIFIED, make_provider
+from records import Fields
+from scheduler import SCHEDULER
+from series import DAILY_FIELDS, HOURLY_FIELDS, Series, forecast_stats
+from viewmodel import Conditions, Panel, ForecastView
 from weather_rock_methods import *
 
-# global variable
+# global variables
 UNICODE_DEGREE = u'\xb0'
+ICONS = IconAtlas()
+DARK_SKY_ICONS = ['clear-day', 'clear-night', 'rain', 'snow', 'sleet', 'wind',
+                  'fog', 'cloudy', 'partly-cloudy-day', 'partly-cloudy-night',
+                  'unknown']
+
+# An umbrella is suggested from a 25% chance of rain, as it always was
+UMBRELLA_THRESHOLD = getattr(config, 'UMBRELLA_THRESHOLD', 0.25)
+PRECIP_WINDOW_HOURS = getattr(config, 'PRECIP_WINDOW_HOURS', 3)
+
+# Everything the forecast screens read from a forecast. Nothing else in a
+# response is kept, see records.py. The screens do not read the records
+# themselves: process_forecast() turns them into one ForecastData for every
+# screen, so the fields are the same whichever screens are shown.
+FORECAST_FIELDS = Fields(
+    currently=('time', 'summary', 'icon', 'temperature', 'apparentTemperature',
+               'humidity', 'windSpeed', 'windBearing'),
+    hourly=HOURLY_FIELDS + ('icon',),
+    daily=DAILY_FIELDS + ('icon',))
+
+# A fetched forecast along with the values derived from it. series is the
+# hourly and daily Series the stats were worked out from.
+ForecastData = collections.namedtuple(
+    'ForecastData', ['weather', 'sunrise', 'sunrise_string', 'sunset',
+                     'sunset_string', 'take_umbrella', 'view', 'stats',
+                     'series'])
 
 
 def deg_to_compass(degrees):
@@ -129,7 +162,7 @@ def get_temperature_letter(unit=config.UNITS):
     return units_decoder(unit)['temperature'].split(' ')[-1][0].upper()
 
 
-def icon_mapping(icon, size):
+def icon_path(icon, size):
     """
     https://darksky.net/dev/docs has this to say about icons:
     icon optional
@@ -170,67 +203,343 @@ def icon_mapping(icon, size):
     return icon_path
 
 
-class Weather:
-    def get_forecast(self, last_update_time):
-        if (time.time() - last_update_time) > config.DS_CHECK_INTERVAL:
-            syslog.syslog("Fetching update from DarkSky")
-            try:
-                self.weather = forecast(config.DS_API_KEY,
-                                        config.LAT,
-                                        config.LON,
-                                        exclude='minutely',
-                                        units=config.UNITS,
-                                        lang=config.LANG)
-
-                sunset_today = datetime.datetime.fromtimestamp(
-                    self.weather.daily[0].sunsetTime)
-                if datetime.datetime.now() < sunset_today:
-                    index = 0
-                    sr_suffix = 'today'
-                    ss_suffix = 'tonight'
-                else:
-                    index = 1
-                    sr_suffix = 'tomorrow'
-                    ss_suffix = 'tomorrow'
-
-                self.sunrise = self.weather.daily[index].sunriseTime
-                self.sunrise_string = datetime.datetime.fromtimestamp(
-                    self.sunrise).strftime("%I:%M %p {}").format(sr_suffix)
-                self.sunset = self.weather.daily[index].sunsetTime
-                self.sunset_string = datetime.datetime.fromtimestamp(
-                    self.sunset).strftime("%I:%M %p {}").format(ss_suffix)
-
-                # start with saying we don't need an umbrella
-                self.take_umbrella = False
-                icon_now = self.weather.icon
-                icon_today = self.weather.daily[0].icon
-                if icon_now == 'rain' or icon_today == 'rain':
-                    self.take_umbrella = True
-                else:
-                    # determine if an umbrella is needed during daylight hours
-                    curr_date = datetime.datetime.today().date()
-                    for hour in self.weather.hourly:
-                        hr = datetime.datetime.fromtimestamp(hour.time)
-                        sr = datetime.datetime.fromtimestamp(
-                            self.weather.daily[0].sunriseTime)
-                        ss = datetime.datetime.fromtimestamp(
-                            self.weather.daily[0].sunsetTime)
-                        rain_chance = hour.precipProbability
-                        is_today = hr.date() == curr_date
-                        is_daylight_hr = hr >= sr and hr <= ss
-                        if is_today and is_daylight_hr and rain_chance >= .25:
-                            self.take_umbrella = True
-                            break
-
-            except requests.exceptions.RequestException as e:
-                print('Request exception: ' + str(e))
-                return False
-            except AttributeError as e:
-                print('Attribute error: ' + str(e))
-                return False
-            return round(time.time())  # new last_update_time
-        return last_update_time
+def icon_mapping(icon, size):
+    """
+    Returns the in-memory surface for a Dark Sky icon name, decoding it only
+    the first time it is asked for.
+    """
+    return ICONS.get(icon_path(icon, size))
+
+
+def preload_icons(size):
+    """
+    Decodes every icon that icon_mapping can return for the given size.
+    """
+    ICONS.preload(icon_path(icon, size) for icon in DARK_SKY_ICONS)
+
+
+# Works out everything the screens need that is derived from a forecast.
+@timed('process forecast')
+# The next sunrise and sunset with their labels, which change at sunset.
+def sun_times(weather):
+    sunset_today = datetime.datetime.fromtimestamp(
+        weather.daily[0].sunsetTime)
+    if datetime.datetime.now() < sunset_today:
+        index = 0
+        sr_suffix = 'today'
+        ss_suffix = 'tonight'
+    else:
+        index = 1
+        sr_suffix = 'tomorrow'
+        ss_suffix = 'tomorrow'
+
+    sunrise = weather.daily[index].sunriseTime
+    sunrise_string = datetime.datetime.fromtimestamp(
+        sunrise).strftime("%I:%M %p {}").format(sr_suffix)
+    sunset = weather.daily[index].sunsetTime
+    sunset_string = datetime.datetime.fromtimestamp(
+        sunset).strftime("%I:%M %p {}").format(ss_suffix)
+    return sunrise, sunrise_string, sunset, sunset_string
+
+
+def process_forecast(weather):
+    hourly = Series(weather.hourly, HOURLY_FIELDS)
+    daily = Series(weather.daily, DAILY_FIELDS)
+    stats = forecast_stats(weather.icon, weather.daily[0].icon, hourly, daily,
+                           UMBRELLA_THRESHOLD, PRECIP_WINDOW_HOURS)
+    log_stats(stats)
+
+    return ForecastData(weather, *sun_times(weather), stats.take_umbrella,
+                        build_view(weather, stats.take_umbrella), stats,
+                        (hourly, daily))
+
+
+def refresh_forecast(data):
+    """
+    The forecast in data again, for when the provider says it has not
+    changed. Only the sunrise and sunset labels and the umbrella advice
+    depend on the time of day; the records, the series and the rest of the
+    view are reused.
+    """
+    weather = data.weather
+    hourly, daily = data.series
+    stats = forecast_stats(weather.icon, weather.daily[0].icon, hourly, daily,
+                           UMBRELLA_THRESHOLD, PRECIP_WINDOW_HOURS)
+    view = data.view
+    if stats.take_umbrella != data.take_umbrella:
+        # The view may be drawn right now, so it is copied, not changed
+        old = view.conditions
+        conditions = Conditions(old.temperature, old.feels_like, old.wind,
+                                old.humidity, old.summary,
+                                umbrella_text(stats.take_umbrella))
+        view = ForecastView(conditions, view.days, view.hours,
+                            view.temperature_letter)
+    return ForecastData(weather, *sun_times(weather), stats.take_umbrella,
+                        view, stats, data.series)
+
+
+def log_stats(stats):
+    text = 'Rain in daylight today: %d hours' % stats.rain_hours_in_daylight
+    if stats.peak_precip_start is not None:
+        text += ', heaviest %s to %s' % (
+            time.strftime("%I:%M %p", time.localtime(stats.peak_precip_start)),
+            time.strftime("%I:%M %p", time.localtime(stats.peak_precip_end)))
+    if stats.max_gust is not None:
+        text += ', gusts up to %d %s' % (round(stats.max_gust),
+                                         get_windspeed_abbreviation())
+    syslog.syslog(text)
+
+
+def temperature_string(temperature):
+    return str(int(round(temperature))) + UNICODE_DEGREE
+
+
+def build_panel(data, label, temperature_letter):
+    if hasattr(data, 'temperatureLow'):
+        temperature = (temperature_string(data.temperatureHigh) + ' / ' +
+                       temperature_string(data.temperatureLow))
+    else:
+        temperature = temperature_string(data.temperature)
+    return Panel(label, temperature + temperature_letter,
+                 str(int(round(data.precipProbability * 100))) + '%',
+                 data.icon)
+
+
+def hour_label(timestamp):
+    hour = datetime.datetime.fromtimestamp(timestamp)
+    if hour.hour <= 11:
+        ampm = 'a.m.'
+    else:
+        ampm = 'p.m.'
+    return "{} {}".format(int(hour.strftime("%I")), ampm)
+
+
+def umbrella_text(take_umbrella):
+    if take_umbrella:
+        return 'Grab your umbrella!'
+    return 'No umbrella needed today.'
+
+
+@timed('build view')
+def build_view(weather, take_umbrella):
+    """
+    Formats everything the daily and hourly screens show, once per forecast.
+    """
+    temperature_letter = get_temperature_letter()
+
+    try:
+        wind_direction = deg_to_compass(weather.windBearing) + ' @ '
+    except AttributeError:
+        wind_direction = ''
+    wind = (wind_direction + str(int(round(weather.windSpeed))) + ' ' +
+            get_windspeed_abbreviation())
+
+    conditions = Conditions(str(int(round(weather.temperature))),
+                            int(round(weather.apparentTemperature)),
+                            wind,
+                            str(int(round(weather.humidity * 100))) + '%',
+                            weather.summary,
+                            umbrella_text(take_umbrella))
+
+    # Today and the following three days
+    days = [build_panel(weather.daily[0], "Today", temperature_letter)]
+    for day in weather.daily[1:4]:
+        label = datetime.datetime.fromtimestamp(day.time).strftime("%A")
+        days.append(build_panel(day, label, temperature_letter))
+
+    # This hour and the following three hours
+    hours = [build_panel(hour, hour_label(hour.time), temperature_letter)
+             for hour in weather.hourly[0:4]]
+
+    return ForecastView(conditions, days, hours, temperature_letter)
 
+
+class ForecastSource:
+    """
+    The forecast for one location (lat, lon): fetched by the scheduler
+    source `name`, processed, and saved to cache_file (if any) for the next
+    start. Every display at that location shows the same one, see
+    forecast_source().
+    """
+    def __init__(self, name, location, cache_file):
+        self.location = location
+        self.cache_file = cache_file
+        # The last forecast processed, refreshed when it has not changed
+        self.data = None
+        self.provider = make_provider(getattr(config, 'PROVIDER', 'darksky'),
+                                      FORECAST_FIELDS, location)
+        # DS_CHECK_INTERVAL is the shortest interval allowed, to protect the
+        # API quota.
+        self.fetcher = SCHEDULER.add_source(
+            name, self.fetch, config.DS_CHECK_INTERVAL,
+            getattr(config, 'DS_TIMEOUT', 15),
+            getattr(config, 'DS_MAX_BACKOFF', 600))
+
+    def fetch(self, timeout):
+        """
+        Runs on the fetcher's thread. Requests a new forecast and processes
+        it, so that a bad response counts as a failed fetch instead of
+        breaking the display. The raw response is saved for the next start.
+        If the provider says nothing changed, the last forecast is kept and
+        only its sunrise and sunset labels and umbrella advice are brought up
+        to date, see refresh_forecast().
+        """
+        raw = self.provider.fetch(timeout)
+        if raw is NOT_MODIFIED:
+            if self.data is not None:
+                self.data = refresh_forecast(self.data)
+                return self.data
+            # Nothing to keep, e.g. the last response could not be processed
+            self.provider.forget()
+            raw = self.provider.fetch(timeout)
+        weather = self.provider.parse(raw)
+        self.data = process_forecast(weather)
+        self.save_cache(raw, round(time.time()))
+        return self.data
+
+    def save_cache(self, raw, fetched_at):
+        if not self.cache_file:
+            return
+        tmp_file = self.cache_file + '.tmp'
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({'fetched_at': fetched_at,
+                           'provider': self.provider.name,
+                           'forecast': raw}, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            syslog.syslog('Unable to save forecast cache: %s' % e)
+
+    def load_cache(self):
+        """
+        Seeds the fetcher with the forecast saved by an earlier run, so the
+        screen can be drawn right away and a restart does not cost an API
+        call while that forecast is newer than DS_CHECK_INTERVAL. Older
+        forecasts are still shown if the first fetch fails. Returns True if
+        a forecast was loaded.
+        """
+        if not self.cache_file:
+            return False
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+            # Caches from before providers existed hold Dark Sky responses
+            if cached.get('provider', 'darksky') != self.provider.name:
+                syslog.syslog('Ignoring forecast cache from %s'
+                              % cached.get('provider', 'darksky'))
+                return False
+            weather = self.provider.parse(cached['forecast'])
+            data = process_forecast(weather)
+            fetched_at = cached['fetched_at']
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            syslog.syslog('Ignoring forecast cache: %s' % e)
+            return False
+        self.data = data
+        self.fetcher.seed(data, fetched_at)
+        syslog.syslog('Loaded %s cached at %s' % (
+            self.fetcher.name,
+            time.strftime("%I:%M:%S %p", time.localtime(fetched_at))))
+        return True
+
+
+# Forecast sources by location, see forecast_source().
+FORECASTS = {}
+
+
+def forecast_source(location):
+    """
+    The ForecastSource for a location (lat, lon), created the first time a
+    display there asks for it, so each location is fetched only once however
+    many displays show it. config.LAT/LON is the 'forecast' source and is
+    cached in DS_CACHE_FILE; other locations get their own name and file.
+    Without DS_CACHE_FILE no forecast is cached.
+    """
+    if location not in FORECASTS:
+        cache_file = getattr(config, 'DS_CACHE_FILE', None)
+        if location == (config.LAT, config.LON):
+            name = 'forecast'
+        else:
+            name = 'forecast %s,%s' % location
+            if cache_file:
+                root, extension = os.path.splitext(cache_file)
+                cache_file = '%s_%s,%s%s' % (
+                    (root,) + location + (extension,))
+        FORECASTS[location] = ForecastSource(name, location, cache_file)
+    return FORECASTS[location]
+
+
+# Seeds every forecast source with what an earlier run saved, see
+# ForecastSource.load_cache().
+def load_cached_forecast():
+    for source in list(FORECASTS.values()):
+        source.load_cache()
+
+
+class Weather(Plugin):
+    def __init__(self, name, display, plugin_config):
+        super().__init__(name, display, plugin_config)
+        # The forecast for where this display is. Its scheduler source is
+        # only called 'forecast' at config.LAT/LON.
+        self.forecast = forecast_source(display.location)
+        self.DATA_SOURCES = {
+            self.forecast.fetcher.name: self.DATA_SOURCES['forecast']}
+
+    # Never blocks: picks up the newest forecast published for this display
+    # and returns its fetch time, or last_update_time if nothing new arrived.
+    # Returns False if no forecast has been fetched yet.
+    def get_forecast(self, last_update_time):
+        snapshot = self.forecast.fetcher.snapshot
+        if snapshot.data is None:
+            return False
+        if snapshot.fetched_at != last_update_time:
+            (self.weather, self.sunrise, self.sunrise_string, self.sunset,
+             self.sunset_string, self.take_umbrella, self.view,
+             self.stats, self.series) = snapshot.data
+        return snapshot.fetched_at
+
+    # Minutes since the forecast was fetched, or None while it is fresh.
+    def stale_minutes(self):
+        age = self.forecast.fetcher.age()
+        if age is None or age < 2 * config.DS_CHECK_INTERVAL:
+            return None
+        return int(age // 60)
+
+    # Everything on the daily and hourly screens except the clock. They only
+    # differ in the four panels along the bottom.
+    @timed('draw forecast')
+    def draw_forecast(self, panels):
+        xmin = 10
+        lines = 5
+        line_color = (255, 255, 255)
+        text_color = (255, 255, 255)
+        font_name = "freesans"
+        conditions = self.view.conditions
+
+        self.draw_screen_border(line_color, xmin, lines)
+        self.disp_current_temp(font_name, text_color)
+        self.disp_summary()
+        self.display_conditions_line('Feels Like:', conditions.feels_like,
+                                     True)
+        self.display_conditions_line('Wind:', conditions.wind, False, 1)
+        self.display_conditions_line('Humidity:', conditions.humidity,
+                                     False, 2)
+
+        # Line 4 is only used to warn that the forecast is out of date
+        stale_minutes = self.stale_minutes()
+        if stale_minutes is not None:
+            self.display_conditions_line(
+                'Updated:', '%d min ago' % stale_minutes, False, 3)
+
+        self.disp_umbrella_info(conditions.umbrella)
+
+        multiplier = 1
+        for panel in panels:
+            self.display_subwindow(panel, multiplier)
+            multiplier += 2
+
+    @timed('draw conditions')
     def display_conditions_line(self, label, cond, is_temp, multiplier=None):
         y_start_position = 0.17
         line_spacing_gap = 0.065
@@ -247,35 +556,38 @@ class Weather:
         else:
             y_start = (y_start_position + line_spacing_gap * multiplier)
 
-        conditions_font = pygame.font.SysFont(
-            font_name, int(self.ymax * conditions_text_height), bold=1)
+        conditions_size = int(self.ymax * conditions_text_height)
 
-        txt = conditions_font.render(str(label), True, text_color)
+        txt = self.text.render(str(label), font_name, conditions_size,
+                               text_color)
 
         self.screen.blit(
             txt, (self.xmax * x_start_position, self.ymax * y_start))
 
-        txt = conditions_font.render(str(cond), True, text_color)
+        txt = self.text.render(str(cond), font_name, conditions_size,
+                               text_color)
         self.screen.blit(txt, (self.xmax * second_column_x_start_position,
                                self.ymax * y_start))
 
         if is_temp:
             txt_x = txt.get_size()[0]
-            degree_font = pygame.font.SysFont(
-                font_name, int(self.ymax * degree_symbol_height), bold=1)
-            degree_txt = degree_font.render(UNICODE_DEGREE, True, text_color)
+            degree_txt = self.text.render(
+                UNICODE_DEGREE, font_name,
+                int(self.ymax * degree_symbol_height), text_color)
             self.screen.blit(degree_txt, (
                 self.xmax * second_column_x_start_position + txt_x * 1.01,
                 self.ymax * (y_start + degree_symbol_y_offset)))
-            degree_letter = conditions_font.render(get_temperature_letter(),
-                                                   True, text_color)
+            degree_letter = self.text.render(
+                self.view.temperature_letter, font_name, conditions_size,
+                text_color)
             degree_letter_x = degree_letter.get_size()[0]
             self.screen.blit(degree_letter, (
                 self.xmax * second_column_x_start_position +
                 txt_x + degree_letter_x * 1.01,
                 self.ymax * (y_start + degree_symbol_y_offset)))
 
-    def display_subwindow(self, data, day, c_times):
+    @timed('draw subwindow')
+    def display_subwindow(self, panel, c_times):
         subwindow_centers = 0.125
         subwindows_y_start_position = 0.530
         line_spacing_gap = 0.065
@@ -284,30 +596,18 @@ class Weather:
         text_color = (255, 255, 255)
         font_name = "freesans"
 
-        forecast_font = pygame.font.SysFont(
-            font_name, int(self.ymax * self.subwindow_text_height), bold=1)
-        rpfont = pygame.font.SysFont(
-            font_name, int(self.ymax * rain_present_text_height), bold=1)
+        forecast_size = int(self.ymax * self.subwindow_text_height)
+        rp_size = int(self.ymax * rain_present_text_height)
 
-        txt = forecast_font.render(day, True, text_color)
+        txt = self.text.render(panel.label, font_name, forecast_size,
+                               text_color)
         (txt_x, txt_y) = txt.get_size()
         self.screen.blit(txt, (self.xmax *
                                (subwindow_centers * c_times) - txt_x / 2,
                                self.ymax * (subwindows_y_start_position +
                                             line_spacing_gap * 0)))
-        if hasattr(data, 'temperatureLow'):
-            txt = forecast_font.render(
-                str(int(round(data.temperatureHigh))) +
-                UNICODE_DEGREE +
-                ' / ' +
-                str(int(round(data.temperatureLow))) +
-                UNICODE_DEGREE + get_temperature_letter(),
-                True, text_color)
-        else:
-            txt = forecast_font.render(
-                str(int(round(data.temperature))) +
-                UNICODE_DEGREE + get_temperature_letter(),
-                True, text_color)
+        txt = self.text.render(panel.temperature, font_name, forecast_size,
+                               text_color)
         (txt_x, txt_y) = txt.get_size()
         self.screen.blit(txt, (self.xmax *
                                (subwindow_centers * c_times) - txt_x / 2,
@@ -315,17 +615,15 @@ class Weather:
                                             line_spacing_gap * 5)))
         # rtxt = forecast_font.render('Rain:', True, lc)
         # self.screen.blit(rtxt, (ro,self.ymax*(wy+gp*5)))
-        rptxt = rpfont.render(
-            str(int(round(data.precipProbability * 100))) + '%',
-            True, text_color)
+        rptxt = self.text.render(panel.precip, font_name, rp_size,
+                                 text_color)
         (txt_x, txt_y) = rptxt.get_size()
         self.screen.blit(rptxt, (self.xmax *
                                  (subwindow_centers * c_times) - txt_x / 2,
                                  self.ymax * (subwindows_y_start_position +
                                               line_spacing_gap *
                                               rain_percent_line_offset)))
-        icon = pygame.image.load(
-            icon_mapping(data.icon, self.icon_size)).convert_alpha()
+        icon = icon_mapping(panel.icon, self.icon_size)
         (icon_size_x, icon_size_y) = icon.get_size()
         if icon_size_y < 90:
             icon_y_offset = (90 - icon_size_y) / 2
@@ -340,19 +638,22 @@ class Weather:
                                  line_spacing_gap
                                  * 1.2) + icon_y_offset))
 
+    @timed('draw summary')
     def disp_summary(self):
         y_start_position = 0.444
         conditions_text_height = 0.04
         text_color = (255, 255, 255)
         font_name = "freesans"
 
-        conditions_font = pygame.font.SysFont(
-            font_name, int(self.ymax * conditions_text_height), bold=1)
-        txt = conditions_font.render(self.weather.summary, True, text_color)
+        conditions_font = self.fonts.get(
+            font_name, int(self.ymax * conditions_text_height))
+        txt = conditions_font.render(self.view.conditions.summary, True,
+                                     text_color)
         txt_x = txt.get_size()[0]
         x = self.xmax * 0.27 - (txt_x * 1.02) / 2
         self.screen.blit(txt, (x, self.ymax * y_start_position))
 
+    @timed('draw umbrella')
     def disp_umbrella_info(self, umbrella_txt):
         x_start_position = 0.52
         y_start_position = 0.444
@@ -360,26 +661,27 @@ class Weather:
         text_color = (255, 255, 255)
         font_name = "freesans"
 
-        conditions_font = pygame.font.SysFont(
-            font_name, int(self.ymax * conditions_text_height), bold=1)
+        conditions_font = self.fonts.get(
+            font_name, int(self.ymax * conditions_text_height))
         txt = conditions_font.render(umbrella_txt, True, text_color)
         self.screen.blit(txt, (
             self.xmax * x_start_position,
             self.ymax * y_start_position))
 
+    @timed('draw temperature')
     def disp_current_temp(self, font_name, text_color):
         # Outside Temp
-        outside_temp_font = pygame.font.SysFont(
-            font_name, int(self.ymax * (0.5 - 0.15) * 0.6), bold=1)
-        txt = outside_temp_font.render(
-            str(int(round(self.weather.temperature))), True, text_color)
+        outside_temp_size = int(self.ymax * (0.5 - 0.15) * 0.6)
+        txt = self.text.render(self.view.conditions.temperature, font_name,
+                               outside_temp_size, text_color)
         (txt_x, txt_y) = txt.get_size()
-        degree_font = pygame.font.SysFont(
-            font_name, int(self.ymax * (0.5 - 0.15) * 0.3), bold=1)
-        degree_txt = degree_font.render(UNICODE_DEGREE, True, text_color)
+        degree_txt = self.text.render(UNICODE_DEGREE, font_name,
+                                      int(self.ymax * (0.5 - 0.15) * 0.3),
+                                      text_color)
         (rendered_am_pm_x, rendered_am_pm_y) = degree_txt.get_size()
-        degree_letter = outside_temp_font.render(get_temperature_letter(),
-                                                 True, text_color)
+        degree_letter = self.text.render(self.view.temperature_letter,
+                                         font_name, outside_temp_size,
+                                         text_color)
         (degree_letter_x, degree_letter_y) = degree_letter.get_size()
         # Position text
         x = self.xmax * 0.27 - (txt_x * 1.02 + rendered_am_pm_x +
@@ -390,6 +692,7 @@ class Weather:
         x = x + (rendered_am_pm_x * 1.02)
         self.screen.blit(degree_letter, (x, self.ymax * 0.2))
 
+    @timed('draw border')
     def draw_screen_border(self, line_color, xmin, lines):
         # Draw Screen Border
         # Top
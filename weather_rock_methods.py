@@ -36,46 +36,35 @@ __version__ = "0.0.13"
 #   Modified By: Gene Liverman    12/30/2017 & multiple times since
 ###############################################################################
 
-# third party imports
-from svg import Parser, Rasterizer
-import pygame
-
-
-# The following method (load_svg) was written by github user "zgoda".
-# https://gist.github.com/zgoda/16c4bb767a085743251503471c1faeb1
-# Web page archive can be found at https://web.archive.org
-def load_svg(filename, scale=None, size=None, clip_from=None, fit_to=None):
-    """Returns Pygame Image object from rasterized SVG
-    -   If scale (float) is provided and is not None, image will be scaled.
-    -   If size (w, h tuple) is provided, the image will be clipped
-        to specified size.
-    -   If clip_from (x, y tuple) is provided, the image will be clipped
-        from specified point.
-    -   If fit_to (w, h tuple) is provided, image will be scaled
-        to fit in specified rect.
+
+class Plugin:
+    """
+    Base class for screens. All screens draw on one shared display; anything
+    a screen does not define itself (screen, xmax, ymax, fonts, compose(),
+    ...) is looked up on that display.
     """
-    svg = Parser.parse_file(filename)
-    tx, ty = 0, 0
-    if size is None:
-        w, h = svg.width, svg.height
-    else:
-        w, h = size
-        if clip_from is not None:
-            tx, ty = clip_from
-    if fit_to is None:
-        if scale is None:
-            scale = 1
-    else:
-        fit_w, fit_h = fit_to
-        scale_w = float(fit_w) / svg.width
-        scale_h = float(fit_h) / svg.height
-        scale = min([scale_h, scale_w])
-    rast = Rasterizer()
-    req_w = int(w * scale)
-    req_h = int(h * scale)
-    buff = rast.rasterize(svg, req_w, req_h, scale, tx, ty)
-    image = pygame.image.frombuffer(buff, (req_w, req_h), 'RGBA')
-    return image
+    # Data sources this screen draws from and how old (in seconds) they may be
+    DATA_SOURCES = {}
+    # Seconds between redraws on top of clock changes and new data, if any
+    POLL_INTERVAL = None
+
+    def __init__(self, name, display, plugin_config):
+        self.name = name
+        self.display = display
+        self.config = plugin_config
+
+    def __getattr__(self, name):
+        # Only called for attributes the screen itself does not have
+        if name == 'display':
+            raise AttributeError(name)
+        return getattr(self.display, name)
+
+    # Returns the new last_update_time, or False if there is nothing to show.
+    def fetch(self, last_update_time):
+        return last_update_time
+
+    def render(self, last_update_time):
+        raise NotImplementedError
 
 
 # Method to keep track of how many times a screen has been shown.